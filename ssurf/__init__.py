@@ -1,6 +1,19 @@
 from .chunk import Chunk
+from .encode import Write
+from .feed import Feed
+from .forward import ReadForward
 from .read import Read
 from .settings import ReaderOptions
+from .update import Update
 from .utils import search_signature
 
-__all__ = ["Chunk", "Read", "ReaderOptions", "search_signature"]
+__all__ = [
+    "Chunk",
+    "Feed",
+    "Read",
+    "ReaderOptions",
+    "ReadForward",
+    "search_signature",
+    "Update",
+    "Write",
+]
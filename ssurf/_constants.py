@@ -306,4 +306,29 @@ GENERIC_CHANNEL_MASK_MAP = {
     0x8000: "Top Back Right",
 }
 
+# Short labels accepted when selecting channels by speaker position
+SPEAKER_ABBREVIATIONS = {
+    "FL": "Front Left",
+    "FR": "Front Right",
+    "FC": "Front Center",
+    "LFE": "Low Frequency",
+    "BL": "Back Left",
+    "BR": "Back Right",
+    "FLC": "Front Left of Center",
+    "FRC": "Front Right of Center",
+    "BC": "Back Center",
+    "SL": "Side Left",
+    "SR": "Side Right",
+    "TC": "Top Center",
+    "TFL": "Top Front Left",
+    "TFR": "Top Front Right",
+    "TBL": "Top Back Left",
+    "TBR": "Top Back Right",
+}
+
+# ['levl'] peak value formats, stored little-endian
+LEVL_FORMAT_UINT8 = 1
+LEVL_FORMAT_UINT16 = 2
+LEVL_DTYPES = {LEVL_FORMAT_UINT8: "<u1", LEVL_FORMAT_UINT16: "<u2"}
+
 # TODO: add the channel_mask_maps for the other formats too
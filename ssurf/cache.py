@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional, Union
+
+from .chunk import ChunkEntry
+from .signatures import Identity
+
+# Bump whenever the layout of a stored record changes
+INDEX_VERSION = 2
+
+# Fields of a record, besides its version, size and modification time
+RECORD_FIELDS = ["identity", "master", "formtype", "byteorder", "ds64", "table"]
+
+# Raised by a cache that cannot be read or written, or by a malformed record
+CACHE_ERRORS = (OSError, AttributeError, TypeError, KeyError, ValueError)
+
+
+class IndexCache:
+    """
+    Persists walked chunk tables in a directory of small sidecar files.
+
+    Records are keyed by the resolved path of the source, and store its size and
+    modification time. A record whose file has since changed is stale, it is
+    removed and treated as missing, and so is a record that is malformed.
+    """
+
+    def __init__(self, directory: Union[Path, str]):
+        self._directory = Path(directory)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def location(self, source: Union[Path, str]) -> Path:
+        """Returns the location of the record for a source path."""
+        resolved = str(Path(source).resolve())
+        key = hashlib.sha1(resolved.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.json"
+
+    def load(self, source: Union[Path, str]) -> Optional[dict]:
+        """
+        Returns the stored record of a source path, or None if it is missing, stale
+        or malformed.
+        """
+        location = self.location(source)
+        try:
+            with open(location, "rb") as index:
+                record = json.loads(index.read())
+        except (OSError, ValueError):
+            return None
+
+        try:
+            stat = os.stat(source)
+            if (
+                record.get("version") != INDEX_VERSION
+                or record.get("size") != stat.st_size
+                or record.get("mtime_ns") != stat.st_mtime_ns
+            ):
+                self.discard(source)
+                return None
+
+            missing = [name for name in RECORD_FIELDS if name not in record]
+            if missing:
+                raise KeyError(f"Missing index record fields: {missing}")
+
+            record["identity"] = Identity(**record["identity"])
+            record["table"] = [ChunkEntry(*entry) for entry in record["table"]]
+        except CACHE_ERRORS:
+            self.discard(source)
+            return None
+
+        return record
+
+    def store(
+        self,
+        source: Union[Path, str],
+        identity: Identity,
+        master: str,
+        formtype: str,
+        byteorder: str,
+        ds64: Optional[dict],
+        table: list,
+    ) -> None:
+        """Stores the walked chunk table of a source path."""
+        stat = os.stat(source)
+        record = {
+            "version": INDEX_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "identity": asdict(identity),
+            "master": master,
+            "formtype": formtype,
+            "byteorder": byteorder,
+            "ds64": ds64,
+            "table": [
+                [
+                    entry.identifier,
+                    entry.header_offset,
+                    entry.payload_offset,
+                    entry.size,
+                    entry.list_type,
+                    entry.padding,
+                ]
+                for entry in table
+            ],
+        }
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        location = self.location(source)
+        # Write then rename, so concurrent readers never see a partial record. The
+        # name is unique to the thread, as threads of a process store at once.
+        temporary = location.with_suffix(
+            f".{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            with open(temporary, "w", encoding="utf-8") as index:
+                json.dump(record, index, separators=(",", ":"))
+            os.replace(temporary, location)
+        except BaseException:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            raise
+
+    def discard(self, source: Union[Path, str]) -> None:
+        """Removes the record of a source path, if any."""
+        try:
+            os.remove(self.location(source))
+        except OSError:
+            pass
@@ -0,0 +1,120 @@
+import hashlib
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from ._types import Source, Stream
+from .settings import ReaderOptions
+
+# Bytes read and hashed at a time
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Blocks in flight between the reading thread and the hashing thread
+PIPELINE_DEPTH = 3
+
+# Files verified at the same time by `verify_files`
+DEFAULT_WORKERS = 4
+
+
+def md5_span(
+    stream: Stream,
+    offset: int,
+    size: int,
+    block_size: int = HASH_BLOCK_SIZE,
+    depth: int = PIPELINE_DEPTH,
+) -> bytes:
+    """
+    Returns the MD5 digest of `size` bytes of `stream`, starting at `offset`.
+
+    Blocks are read on a background thread into `depth` reused buffers while the
+    calling thread hashes them. Both reading and hashing release the GIL, so the
+    stream is read at the speed of the disk rather than of the two added up. A short
+    stream hashes whatever it holds.
+    """
+    if block_size <= 0 or depth <= 0:
+        raise ValueError(f"Invalid block size {block_size} or depth {depth}.")
+
+    digest = hashlib.md5()
+    if size <= block_size:
+        digest.update(stream.read_at(offset, size))
+        return digest.digest()
+
+    free = queue.Queue()
+    filled = queue.Queue()
+    for _ in range(depth):
+        free.put(bytearray(block_size))
+
+    def produce() -> None:
+        position, remaining = offset, size
+        try:
+            while remaining > 0:
+                buffer = free.get()
+                if buffer is None:
+                    # The hashing thread gave up
+                    return
+
+                read = stream.readinto_at(
+                    memoryview(buffer)[: min(block_size, remaining)], position
+                )
+                if read <= 0:
+                    break
+
+                filled.put((buffer, read))
+                position += read
+                remaining -= read
+        except BaseException as error:
+            filled.put(error)
+            return
+
+        filled.put(None)
+
+    producer = threading.Thread(target=produce, name="ssurf-md5-reader", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = filled.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+
+            buffer, read = item
+            digest.update(memoryview(buffer)[:read])
+            free.put(buffer)
+    finally:
+        # Unblocks the reading thread if hashing stopped early
+        free.put(None)
+        producer.join()
+
+    return digest.digest()
+
+
+def verify_files(
+    sources: Iterable[Source],
+    workers: int = DEFAULT_WORKERS,
+    options: Optional[ReaderOptions] = None,
+    block_size: int = HASH_BLOCK_SIZE,
+) -> Dict[Source, Optional[bool]]:
+    """
+    Verifies the ['MD5 '] chunk of many files at once, on a pool of `workers` threads.
+
+    Returns whether the ['data'] payload of each source matches its checksum, or None
+    if the source has no ['MD5 '] chunk. Errors raised while reading a source are
+    raised here.
+    """
+    # Imported here, as `Read` itself hashes with this module
+    from .read import DEFAULT_ROPTS, Read
+
+    options = options or DEFAULT_ROPTS
+
+    def verify(source: Source) -> Optional[bool]:
+        with Read(source, options) as reader:
+            if not reader.has_chunk("MD5 "):
+                return None
+            return reader.verify_md5(block_size)
+
+    sources = list(sources)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(sources, executor.map(verify, sources)))
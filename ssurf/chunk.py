@@ -1,13 +1,141 @@
-from typing import Generator, List, Optional, Tuple
+import struct
+import sys
+import threading
+
+from dataclasses import dataclass, field
+from typing import Callable, Generator, List, Optional, Tuple, Union
 
 from ._constants import ENCODING, FALSE_SIZE, NULL_IDENTIFIER
-from ._types import Byteorder, Stream
+from ._types import Byteorder, Payload, Stream
+from .stream import HEADER_READ_SIZE, MmapSource, positioned_read
+from .utils import byteorder_symbol
 
 # Default chunks to ignore
 IGNORE_CHUNKS = ["data", "JUNK", "FLLR", "PAD "]
 
 # Only valid 'master' identifiers
-RIFF_BASED = ["RIFF", "RIFX", "FIRR", "BW64"]
+RIFF_BASED = ["RIFF", "RIFX", "FFIR", "FIRR", "BW64"]
+
+
+# Bytes read at once when the walk reaches a chunk header outside of any window
+WALK_READ_SIZE = 64 * 1024
+
+# Read-ahead windows kept from the walk, the oldest is dropped first
+MAX_WALK_WINDOWS = 8
+
+# Payloads at most this far apart are fetched by the same read
+COALESCE_GAP = 64 * 1024
+
+# Largest coalesced read, larger payloads are read on their own
+COALESCE_LIMIT = 8 * 1024 * 1024
+
+# ds64 header and fields up to the table: 4 + 4 + 7 * 4 bytes
+DS64_READ_SIZE = 36
+DS64_FIELDS = [
+    "riff_low_size",
+    "riff_high_size",
+    "data_low_size",
+    "data_high_size",
+    "sample_low_count",
+    "sample_high_count",
+    "table_entry_count",
+]
+
+
+def parse_ds64(header: bytes, byteorder: Byteorder) -> dict:
+    """Parses the ['ds64'] chunk, from its header up to its table."""
+    ds64_identifier = header[:4].decode(ENCODING)
+    if ds64_identifier != "ds64":
+        raise ValueError(f"Expected ds64 chunk but found {ds64_identifier}")
+
+    if len(header) < DS64_READ_SIZE:
+        raise ValueError("The ['ds64'] chunk is truncated.")
+
+    symbol = byteorder_symbol(byteorder)
+    (ds64_size, *values) = struct.unpack(f"{symbol}8I", header[4:DS64_READ_SIZE])
+
+    return {
+        "chunk_identifier": ds64_identifier,
+        "chunk_size": ds64_size,
+        **dict(zip(DS64_FIELDS, values)),
+    }
+
+
+def plan_reads(
+    entries: List["ChunkEntry"],
+    gap: int = COALESCE_GAP,
+    limit: int = COALESCE_LIMIT,
+) -> List[Tuple[int, int]]:
+    """
+    Merges the payloads of `entries` into as few (offset, size) reads as possible.
+
+    Payloads are merged with the previous read when the bytes between them are at
+    most `gap`, and the merged read stays within `limit`.
+    """
+    spans = sorted(
+        (entry.payload_offset, entry.payload_offset + entry.size) for entry in entries
+    )
+
+    reads = []
+    for start, end in spans:
+        if reads and start - reads[-1][1] <= gap and end - reads[-1][0] <= limit:
+            reads[-1][1] = max(reads[-1][1], end)
+        else:
+            reads.append([start, end])
+
+    return [(start, end - start) for start, end in reads]
+
+
+def is_skipped(
+    entry: "ChunkEntry", ignore_chunks: List[str], only_chunks: Optional[List[str]]
+) -> bool:
+    """
+    Determines whether the payload of a chunk should be left unread.
+
+    A chunk is skipped if it is ignored, or if an allow-list is set and neither
+    its identifier nor its list-type is in it. ['fmt '] is never skipped.
+    """
+    if entry.identifier == "fmt ":
+        return False
+
+    if ignore_chunks and entry.identifier in ignore_chunks:
+        return True
+
+    if only_chunks is not None:
+        return (
+            entry.identifier not in only_chunks and entry.list_type not in only_chunks
+        )
+
+    return False
+
+
+@dataclass(slots=True)
+class ChunkEntry:
+    """Location of a single chunk within the stream."""
+
+    identifier: str
+    header_offset: int
+    payload_offset: int
+    size: int
+    # Form type of a ['LIST'] chunk (INFO, adtl ...)
+    list_type: Optional[str] = None
+    # Pad byte counted in `size` when the stored size is odd
+    padding: int = 0
+
+
+@dataclass
+class DeferredPayload:
+    """Reference to a payload that was too large to be read eagerly."""
+
+    entry: ChunkEntry
+    reader: Callable[[ChunkEntry], Payload] = field(repr=False)
+
+    def read(self) -> Payload:
+        """Reads the referenced payload from the stream."""
+        return self.reader(self.entry)
+
+    def __len__(self) -> int:
+        return self.entry.size
 
 
 class Chunk:
@@ -15,9 +143,25 @@ class Chunk:
         self,
         stream: Stream,
         ignore_chunks: List[str] = [],
+        only_chunks: Optional[List[str]] = None,
+        max_eager_payload: Optional[int] = None,
+        header: Optional[bytes] = None,
     ):
         self._stream = stream
+        # Spans of the stream read in one go, as (offset, bytes, reaches the end).
+        # The header comes first and stays until `unpin`, the read-aheads of a walk
+        # last as long as the walk, and fetches until `release`. The list is replaced
+        # rather than changed, so readers need no lock.
+        self._windows: List[Tuple[int, bytes, bool]] = []
+        self._windows_lock = threading.Lock()
+        self._pinned = 0
+        self._walk_windows: List[int] = []
+        if header is not None:
+            self._windows.append((0, header, len(header) < HEADER_READ_SIZE))
+            self._pinned = 1
         self._ignore_chunks = ignore_chunks
+        self._only_chunks = only_chunks
+        self._max_eager_payload = max_eager_payload
 
         self.byteorder: Byteorder
         self.chunk_identifiers: List[str] = []
@@ -34,11 +178,31 @@ class Chunk:
     def ignore_chunks(self) -> List[str]:
         return self._ignore_chunks
 
+    @property
+    def only_chunks(self) -> Optional[List[str]]:
+        return self._only_chunks
+
+    @property
+    def max_eager_payload(self) -> Optional[int]:
+        return self._max_eager_payload
+
+    def deferred(self, entry: ChunkEntry) -> bool:
+        """Determines whether a chunk is too large to be read eagerly."""
+        return (
+            self.max_eager_payload is not None
+            and entry.identifier != "fmt "
+            and entry.size > self.max_eager_payload
+        )
+
+    def skipped(self, entry: ChunkEntry) -> bool:
+        """Determines whether the payload of a chunk should be left unread."""
+        return is_skipped(entry, self.ignore_chunks, self.only_chunks)
+
     def get_byteorder(self, master: str) -> Byteorder:
         """Determines the byte order based on the master chunk identifier."""
         if master in ["RIFF", "BW64", "RF64"]:
             return "little"
-        elif master in ["RIFX", "FIRR"]:
+        elif master in ["RIFX", "FFIR", "FIRR"]:
             return "big"
         else:
             raise ValueError(f"Invalid master chunk identifier: {master}")
@@ -46,17 +210,145 @@ class Chunk:
     def riff_based(self, master: str) -> bool:
         return master in RIFF_BASED
 
-    def get_chunks(self) -> Generator[Tuple[str, int, bytes], None, None]:
-        self.stream.seek(0)
-        master = self.stream.read(4).decode(ENCODING)
+    def buffered(self, offset: int, size: int) -> Optional[bytes]:
+        """Returns `size` bytes at `offset` from a window holding them, if any."""
+        for start, window, reaches_end in self._windows:
+            if start <= offset and (
+                offset + size <= start + len(window) or reaches_end
+            ):
+                return window[offset - start : offset - start + size]
+
+        return None
+
+    def buffer(self, offset: int, size: int) -> None:
+        """Reads `size` bytes at `offset` in a single read, and keeps them as a window."""
+        window = positioned_read(self.stream, offset, size)
+        with self._windows_lock:
+            self._windows = self._windows + [(offset, window, len(window) < size)]
+
+    def release(self) -> None:
+        """Drops every window but the header, unless it was unpinned."""
+        with self._windows_lock:
+            self._windows = self._windows[: self._pinned]
+            self._walk_windows = []
+
+    def release_walk(self) -> None:
+        """Drops the read-ahead windows of the walk."""
+        with self._windows_lock:
+            walked = set(self._walk_windows)
+            self._windows = self._windows[: self._pinned] + [
+                window
+                for window in self._windows[self._pinned :]
+                if window[0] not in walked
+            ]
+            self._walk_windows = []
+
+    def unpin(self) -> None:
+        """Drops the header window, once the chunks it was kept for are decoded."""
+        with self._windows_lock:
+            self._windows = self._windows[self._pinned :]
+            self._pinned = 0
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """Reads `size` bytes starting at `offset`, from a window if one holds them."""
+        data = self.buffered(offset, size)
+        if data is not None:
+            return data
+
+        return positioned_read(self.stream, offset, size)
+
+    def read_ahead(self, offset: int, size: int) -> bytes:
+        """
+        Reads `size` bytes starting at `offset` through a `WALK_READ_SIZE` window.
+
+        The walk reads chunk headers one after the other, so a single read usually
+        serves the headers (and payloads) of every chunk that follows. Memory-mapped
+        streams are read directly.
+        """
+        data = self.buffered(offset, size)
+        if data is not None or isinstance(self.stream, MmapSource):
+            return data if data is not None else self.read_at(offset, size)
+
+        if len(self._walk_windows) >= MAX_WALK_WINDOWS:
+            with self._windows_lock:
+                oldest = self._walk_windows.pop(0)
+                self._windows = [
+                    window for window in self._windows if window[0] != oldest
+                ]
+
+        self.buffer(offset, max(size, WALK_READ_SIZE))
+        self._walk_windows.append(offset)
+
+        return self.buffered(offset, size)
+
+    def fetch(self, entries: List[ChunkEntry]) -> None:
+        """
+        Reads the payloads of `entries` ahead of time, in as few reads as possible.
+
+        Payloads that are already buffered, or larger than `COALESCE_LIMIT`, are left
+        out. Nearby payloads are merged by `plan_reads`, and each merged span is read
+        with a single positioned read, kept until `release`.
+        """
+        if isinstance(self.stream, MmapSource):
+            return
+
+        pending = [
+            entry
+            for entry in entries
+            if entry.size <= COALESCE_LIMIT
+            and self.buffered(entry.payload_offset, entry.size) is None
+        ]
+        for offset, size in plan_reads(pending):
+            self.buffer(offset, size)
+
+    def read_chunk(self, entry: ChunkEntry) -> Payload:
+        """Reads the payload of a walked chunk."""
+        data = self.buffered(entry.payload_offset, entry.size)
+        if data is not None:
+            return data
+
+        # Memory-mapped streams return a zero-copy view into the mapping
+        if isinstance(self.stream, MmapSource):
+            return self.stream.view_at(entry.payload_offset, entry.size)
+
+        return positioned_read(self.stream, entry.payload_offset, entry.size)
+
+    def get_chunks(
+        self,
+    ) -> Generator[Tuple[str, int, Union[Payload, DeferredPayload]], None, None]:
+        """Yields every chunk along with its payload, unless it is skipped."""
+        for entry in self.walk():
+            if self.skipped(entry):
+                chunk_data = b""
+            elif self.deferred(entry):
+                chunk_data = DeferredPayload(entry, self.read_chunk)
+            else:
+                chunk_data = self.read_chunk(entry)
+
+            yield (entry.identifier, entry.size, chunk_data)
+
+    def walk(self) -> Generator[ChunkEntry, None, None]:
+        """
+        Walks the chunk headers of the stream without reading any payload.
+
+        Only the master, ds64 and chunk headers are read, along with the form type
+        of each ['LIST'] chunk. The read-ahead windows are dropped once it ends.
+        """
+        try:
+            yield from self._walk()
+        finally:
+            self.release_walk()
+
+    def _walk(self) -> Generator[ChunkEntry, None, None]:
+        header = self.read_at(0, 12)
+        master = header[:4].decode(ENCODING)
         self.master = master
 
         self.byteorder = self.get_byteorder(master)
 
-        master_size_bytes = self.stream.read(4)
-        master_size = hex(int.from_bytes(master_size_bytes, byteorder=self.byteorder))
+        master_size = hex(int.from_bytes(header[4:8], byteorder=self.byteorder))
 
-        formtype = self.stream.read(4).decode(ENCODING)
+        formtype = header[8:12].decode(ENCODING)
         self.formtype = formtype
 
         if master_size == FALSE_SIZE:
@@ -67,13 +359,32 @@ class Chunk:
         else:
             raise ValueError(f"Unknown or unsupported format: {master}")
 
-    def _riff(self) -> Generator[Tuple[str, int, bytes], None, None]:
+    def _entry(
+        self, chunk_identifier: str, offset: int, chunk_size: int, padding: int
+    ) -> ChunkEntry:
+        list_type = None
+        if chunk_identifier == "LIST":
+            list_type = self.read_ahead(offset + 8, 4).decode(ENCODING).strip()
+            list_type = sys.intern(list_type)
+
+        return ChunkEntry(
+            # Identifiers are shared by every chunk table that is kept around
+            identifier=sys.intern(chunk_identifier),
+            header_offset=offset,
+            payload_offset=offset + 8,
+            size=chunk_size,
+            list_type=list_type,
+            padding=padding,
+        )
+
+    def _riff(self) -> Generator[ChunkEntry, None, None]:
+        offset = 12
         while True:
-            identifier_bytes = self.stream.read(4)
-            if len(identifier_bytes) < 4:
+            header = self.read_ahead(offset, 8)
+            if len(header) < 8:
                 break
 
-            chunk_identifier = identifier_bytes.decode(ENCODING)
+            chunk_identifier = header[:4].decode(ENCODING)
             # if chunk_identifier == "afsp":
             # records from the `afsp` chunk are transferred to DISP/LIST[INFO] chunks
             # thus, the `afsp` is ignored as it contains no size field
@@ -81,90 +392,40 @@ class Chunk:
             # self._skip_afsp()
             # continue
 
-            size_bytes = self.stream.read(4)
-            if len(size_bytes) < 4:
-                break
-
-            chunk_size = int.from_bytes(size_bytes, byteorder=self.byteorder)
+            chunk_size = int.from_bytes(header[4:], byteorder=self.byteorder)
             # account for padding or null bytes if chunk_size is odd
             # NOTE: It seems that the `bext` chunk does not follow the
             # "All chunks MUST have an even size" rule, so it is ignored
+            padding = 0
             if chunk_size % 2 != 0 and chunk_identifier != "bext":
+                padding = 1
                 chunk_size += 1
 
-            # ignore certain chunks
-            if self.ignore_chunks and chunk_identifier in self.ignore_chunks:
-                chunk_data = b""
-            else:
-                chunk_data = self.stream.read(chunk_size)
-
             self.chunk_identifiers.append(chunk_identifier)
-            yield (chunk_identifier, chunk_size, chunk_data)
+            yield self._entry(chunk_identifier, offset, chunk_size, padding)
 
             # Skip to the start of the next chunk
-            self.stream.seek(chunk_size - len(chunk_data), 1)
-
-    def _rf64(self) -> Generator[Tuple[str, int, bytes], None, None]:
-        ds64_identifier = self.stream.read(4).decode(ENCODING)
-        if ds64_identifier != "ds64":
-            raise ValueError(f"Expected ds64 chunk but found {ds64_identifier}")
-
-        # TODO: simplify this with struct
-        ds64_size_bytes = self.stream.read(4)
-        ds64_size = int.from_bytes(ds64_size_bytes, byteorder=self.byteorder)
+            offset += 8 + chunk_size
 
-        riff_low_size_bytes = self.stream.read(4)
-        riff_low_size = int.from_bytes(riff_low_size_bytes, byteorder=self.byteorder)
+    def _rf64(self) -> Generator[ChunkEntry, None, None]:
+        ds64 = parse_ds64(self.read_at(12, DS64_READ_SIZE), self.byteorder)
+        self.ds64 = ds64
 
-        riff_high_size_bytes = self.stream.read(4)
-        riff_high_size = int.from_bytes(riff_high_size_bytes, byteorder=self.byteorder)
-
-        data_low_size_bytes = self.stream.read(4)
-        data_low_size = int.from_bytes(data_low_size_bytes, byteorder=self.byteorder)
-
-        data_high_size_bytes = self.stream.read(4)
-        data_high_size = int.from_bytes(data_high_size_bytes, byteorder=self.byteorder)
-
-        sample_low_count_bytes = self.stream.read(4)
-        sample_low_count = int.from_bytes(
-            sample_low_count_bytes, byteorder=self.byteorder
-        )
-
-        sample_high_count_bytes = self.stream.read(4)
-        sample_high_count = int.from_bytes(
-            sample_high_count_bytes, byteorder=self.byteorder
-        )
-
-        table_entry_count_bytes = self.stream.read(4)
-        table_entry_count = int.from_bytes(
-            table_entry_count_bytes, byteorder=self.byteorder
-        )
+        data_low_size = ds64["data_low_size"]
+        data_high_size = ds64["data_high_size"]
 
         # Not accounting for table_entry_count > 0
         # Once a test file is procured, it will be done.
 
-        self.ds64 = {
-            "chunk_identifier": ds64_identifier,
-            "chunk_size": ds64_size,
-            "riff_low_size": riff_low_size,
-            "riff_high_size": riff_high_size,
-            "data_low_size": data_low_size,
-            "data_high_size": data_high_size,
-            "sample_low_count": sample_low_count,
-            "sample_high_count": sample_high_count,
-            "table_entry_count": table_entry_count,
-        }
-
         # Skip to end of ds64 chunk
-        current_location = self.stream.tell()
-        self.stream.seek(current_location + table_entry_count * 12)
+        offset = 12 + DS64_READ_SIZE + ds64["table_entry_count"] * 12
 
         while True:
-            identifier_bytes = self.stream.read(4)
-            if len(identifier_bytes) < 4:
+            header = self.read_ahead(offset, 8)
+            if len(header) < 8:
                 break
 
-            chunk_identifier = identifier_bytes.decode(ENCODING)
+            chunk_identifier = header[:4].decode(ENCODING)
 
             # if chunk_identifier == "afsp":
             # self._skip_afsp()
@@ -174,31 +435,20 @@ class Chunk:
                 # For cases other than default, the true sizes
                 # of the chunks are stored in the 'ds64' chunk
                 case "data":
-                    self.stream.read(4)
                     chunk_size = data_low_size + (data_high_size << 32)
-                case "fact":
-                    self.stream.read(4)
-                    chunk_size = sample_low_count + (sample_high_count << 32)
+                # The 'fact' sample count is stored in ds64, but not its chunk size
                 case _:
-                    size_bytes = self.stream.read(4)
-                    if len(size_bytes) < 4:
-                        break
-
-                    chunk_size = int.from_bytes(size_bytes, byteorder=self.byteorder)
+                    chunk_size = int.from_bytes(header[4:], byteorder=self.byteorder)
 
+            padding = 0
             if chunk_size % 2 != 0 and chunk_identifier != "bext":
+                padding = 1
                 chunk_size += 1
 
-            # Solves the performance issue (if the user opts in).
-            # The stream.read() call on an RF64 file is obscene.
-            # The chunk_data is never used after being returned, anyways.
-            if chunk_identifier in self.ignore_chunks:
-                chunk_data = b""
-            else:
-                chunk_data = self.stream.read(chunk_size)
-
+            # Payloads are no longer read here, which is what made walking
+            # an RF64 stream obscenely slow.
             if chunk_identifier != NULL_IDENTIFIER:
                 self.chunk_identifiers.append(chunk_identifier)
-                yield (chunk_identifier, chunk_size, chunk_data)
+                yield self._entry(chunk_identifier, offset, chunk_size, padding)
 
-            self.stream.seek(chunk_size - len(chunk_data), 1)
+            offset += 8 + chunk_size
@@ -3,7 +3,7 @@ import struct
 import uuid
 import xml.etree.ElementTree as ET
 
-from typing import Generator, Tuple, Union
+from typing import Callable, Dict, Generator, List, Optional, Tuple, Union
 
 from ._constants import (
     CF_TYPES,
@@ -38,6 +38,7 @@ from .chunk_models import (
     CueChunk,
     DataChunk,
     DisplayChunk,
+    EntryTable,
     FactChunk,
     InfoChunk,
     InstrumentChunk,
@@ -53,13 +54,14 @@ from .chunk_models import (
     ExtensibleFormat,
     PEXFormat,
 )
-from .utils import sanitize_fallback
+from .utils import intern_text, sanitize_fallback
 
 
 class CKDecoder:
-    def __init__(self, byteorder: Byteorder, sign: str):
+    def __init__(self, byteorder: Byteorder, sign: str, columnar: bool = False):
         self._byteorder = byteorder
         self._sign = sign
+        self._columnar = columnar
 
         self._mode = None
         self._sanity = []
@@ -76,6 +78,46 @@ class CKDecoder:
     def sign(self) -> str:
         return self._sign
 
+    @property
+    def columnar(self) -> bool:
+        return self._columnar
+
+    def decode_table(
+        self,
+        payload: Payload,
+        offset: int,
+        count: int,
+        pattern: str,
+        factory: Callable,
+        names: List[str],
+        converters: Optional[Dict[str, Callable]] = None,
+    ) -> Union[list, EntryTable]:
+        """
+        Unpacks `count` fixed size entries starting at `offset` in a single pass.
+
+        Entries are unpacked with `struct.iter_unpack` straight into one column per
+        field. Columnar decoders return them as an `EntryTable`, which only builds
+        entry objects on access, otherwise every entry is built into a list.
+        """
+        size = struct.calcsize(pattern)
+        table = memoryview(payload)[offset : offset + count * size]
+        if len(table) != count * size:
+            raise struct.error(f"unpack requires a buffer of {count * size} bytes")
+
+        rows = struct.iter_unpack(pattern, table)
+        if not self.columnar and not converters:
+            return [factory(*row) for row in rows]
+
+        columns = dict(zip(names, list(zip(*rows)) or [()] * len(names)))
+        for name, converter in (converters or {}).items():
+            columns[name] = tuple(map(converter, columns[name]))
+
+        entries = EntryTable(factory, columns)
+        if self.columnar:
+            return entries
+
+        return list(entries)
+
     @property
     def sanity(self) -> []:
         return self._sanity
@@ -169,9 +211,10 @@ class CKDecoder:
         )
 
         description = sanitize_fallback(description, "ascii")
-        originator = sanitize_fallback(originator, "ascii")
+        # Originators, dates and coding histories repeat across files, share them
+        originator = intern_text(sanitize_fallback(originator, "ascii"))
         originator_reference = sanitize_fallback(originator_reference, "ascii")
-        origin_date = sanitize_fallback(origin_date, "ascii")
+        origin_date = intern_text(sanitize_fallback(origin_date, "ascii"))
         origin_time = sanitize_fallback(origin_time, "ascii")
 
         time_reference_low, time_reference_high, version = struct.unpack(
@@ -289,29 +332,20 @@ class CKDecoder:
         #   CHAR    pad;            // padding byte to ensure even number of bytes
         # }
         track_pattern = f"{self.sign}H12s14s11sc"
-        track_ids = []
-        offset = 4
-
-        for _ in range(uid_count):
-            (track_index, uid, track_reference, pack_reference, pad) = struct.unpack(
-                track_pattern, payload[offset : offset + 40]
-            )
-
-            uid = sanitize_fallback(uid, "ascii")
-            track_reference = sanitize_fallback(track_reference, "ascii")
-            pack_reference = sanitize_fallback(pack_reference, "ascii")
-            padded = pad == b"\x00"
-
-            audio_id = AudioID(
-                track_index=track_index,
-                uid=uid,
-                track_reference=track_reference,
-                pack_reference=pack_reference,
-                padded=padded,
-            )
-
-            track_ids.append(audio_id)
-            offset += 40
+        track_ids = self.decode_table(
+            payload,
+            4,
+            uid_count,
+            track_pattern,
+            AudioID,
+            ["track_index", "uid", "track_reference", "pack_reference", "padded"],
+            {
+                "uid": lambda value: sanitize_fallback(value, "ascii"),
+                "track_reference": lambda value: sanitize_fallback(value, "ascii"),
+                "pack_reference": lambda value: sanitize_fallback(value, "ascii"),
+                "padded": lambda pad: pad == b"\x00",
+            },
+        )
 
         return ChnaChunk(
             track_count=track_count,
@@ -323,20 +357,21 @@ class CKDecoder:
         """Decoder for the ['cue '] chunk."""
         point_count = struct.unpack(f"{self.sign}I", payload[:4])
 
-        cue_points = []
-        curr = 4
-
-        for cue in range(point_count[0]):
-            (point_id, position, chunk_id, chunk_start, block_start, sample_start) = (
-                struct.unpack(f"{self.sign}IIIIII", payload[curr : curr + 24])
-            )
-
-            cue_point = CuePoint(
-                point_id, position, chunk_id, chunk_start, block_start, sample_start
-            )
-
-            cue_points.append(cue_point)
-            curr += 24
+        cue_points = self.decode_table(
+            payload,
+            4,
+            point_count[0],
+            f"{self.sign}IIIIII",
+            CuePoint,
+            [
+                "point_id",
+                "position",
+                "chunk_id",
+                "chunk_start",
+                "block_start",
+                "sample_start",
+            ],
+        )
 
         return CueChunk(
             point_count=point_count[0],
@@ -579,7 +614,8 @@ class CKDecoder:
                 if not tag_data:
                     tag_data = sanitize_fallback(data_bytes, DEFAULT_ENCODING)
 
-                yield (tag_identifier, tag_size, tag_data)
+                # Tag values (artists, software, genres ...) repeat across files
+                yield (tag_identifier, tag_size, intern_text(tag_data))
 
         for tag_identifier, _, tag_data in yield_info():
             match tag_identifier:
@@ -720,24 +756,15 @@ class CKDecoder:
         )
 
         loop_pattern = f"{self.sign}IIIIII"
-        sample_loops = []
-        offset = 36
-        for _ in range(sample_loop_count):
-            (identifier, loop_type, start, end, fraction, loop_count) = struct.unpack(
-                loop_pattern, payload[offset : offset + 24]
-            )
-
-            sample_loop = SampleLoop(
-                identifier=identifier,
-                loop_type=loop_type,
-                start=start,
-                end=end,
-                fraction=fraction,
-                loop_count=loop_count,
-            )
-
-            sample_loops.append(sample_loop)
-            offset += 24
+        sample_loops = self.decode_table(
+            payload,
+            36,
+            sample_loop_count,
+            loop_pattern,
+            SampleLoop,
+            ["identifier", "loop_type", "start", "end", "fraction", "loop_count"],
+        )
+        offset = 36 + sample_loop_count * 24
 
         sampler_data = (
             payload[offset : offset + sampler_data_size]
@@ -780,39 +807,27 @@ class CKDecoder:
         ) = struct.unpack(header_pattern, payload[:28])
 
         slice_pattern = f"{self.sign}IIQQII"
-        slice_blocks = []
-        offset = 28
-        total_data_size = len(payload)
-
-        for i in range(slice_count):
-            if offset + 32 > total_data_size:
-                location = f"{STRC_CHUNK_LOCATION} -- SLICE {i}"
-                error_message = (
-                    "NOT ENOUGH DATA TO UNPACK SLICE -- MISSING OR PADDED SLICE."
-                )
-                sanity.append(PerverseError(location, error_message))
-                break
+        available = max(len(payload) - 28, 0) // 32
+        if slice_count > available:
+            location = f"{STRC_CHUNK_LOCATION} -- SLICE {available}"
+            error_message = "NOT ENOUGH DATA TO UNPACK SLICE -- MISSING OR PADDED SLICE."
+            sanity.append(PerverseError(location, error_message))
 
-            try:
-                (data1, data2, sample_position, sample_position2, data3, data4) = (
-                    struct.unpack(slice_pattern, payload[offset : offset + 32])
-                )
-            except struct.error as e:
-                location = f"{STRC_CHUNK_LOCATION} -- SLICE {i}"
-                error_message = "SLICE {i} COULD NOT BE UNPACKED: {e}"
-                sanity.append(PerverseError(location, error_message))
-                break
-
-            slice_block = SliceBlock(
-                data1=data1,
-                data2=data2,
-                sample_position=sample_position,
-                sample_position2=sample_position2,
-                data3=data3,
-                data4=data4,
-            )
-            slice_blocks.append(slice_block)
-            offset += 32
+        slice_blocks = self.decode_table(
+            payload,
+            28,
+            min(slice_count, available),
+            slice_pattern,
+            SliceBlock,
+            [
+                "data1",
+                "data2",
+                "sample_position",
+                "sample_position2",
+                "data3",
+                "data4",
+            ],
+        )
 
         if len(slice_blocks) != slice_count:
             location = f"{STRC_CHUNK_LOCATION} -- SLICE BLOCKS"
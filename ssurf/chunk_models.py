@@ -1,10 +1,16 @@
+from collections.abc import Sequence
 from dataclasses import dataclass, field, fields
-from typing import List, Optional, Union
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
 
+from ._constants import LEVL_DTYPES
 from ._types import FourCC, Size, Payload
+from .decode import require_numpy
 
+if TYPE_CHECKING:
+    import numpy as np
 
-@dataclass
+
+@dataclass(slots=True)
 class BaseChunk:
     """Common structure that all RIFF chunks adhere to."""
 
@@ -12,20 +18,95 @@ class BaseChunk:
     size: Optional[Size] = field(default=None, init=False)
 
 
-@dataclass
+class EntryTable(Sequence):
+    """
+    Table of chunk entries (cue points, loops, slices ...) stored column by column.
+
+    Every field is held in a single column, in the order of the fields of the entry
+    type, and an entry object is only built when it is indexed or iterated over.
+    Columns can be read directly with `column`.
+    """
+
+    __slots__ = ("_factory", "_columns", "_length")
+
+    def __init__(self, factory: Callable, columns: Dict[str, Tuple]):
+        self._factory = factory
+        self._columns = columns
+        self._length = len(next(iter(columns.values()), ()))
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> Tuple:
+        """Returns every value of a field, in entry order."""
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Entry index out of range.")
+
+        return self._factory(*(column[index] for column in self._columns.values()))
+
+    def __iter__(self):
+        for values in zip(*self._columns.values()):
+            yield self._factory(*values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (EntryTable, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._factory.__name__}, {len(self)} entries)"
+
+
+@dataclass(slots=True)
 class GenericChunk(BaseChunk):
     """Default chunk for unsupported or unparsed chunks."""
 
     payload: Payload
 
 
-@dataclass
+@dataclass(slots=True)
 class SubFormat:
     audio_format: int
     guid: str
 
 
-@dataclass
+# Fields of the extended, extensible and PVOC-EX formats, None for plainer formats
+FORMAT_EXTENSION_FIELDS = frozenset(
+    [
+        "extension_size",
+        "valid_bits_per_sample",
+        "channel_mask",
+        "speaker_layout",
+        "sfmt",
+        "version",
+        "pvoc_size",
+        "word_format",
+        "analysis_format",
+        "source_format",
+        "window_type",
+        "bin_count",
+        "window_length",
+        "overlap",
+        "frame_align",
+        "analysis_rate",
+        "window_param",
+    ]
+)
+
+
+@dataclass(slots=True)
 class PCMFormat(BaseChunk):
     """Standard ['fmt '] chunk."""
 
@@ -38,29 +119,20 @@ class PCMFormat(BaseChunk):
     bitrate: int
     bitrate_long: str
 
-    extension_size: Optional[int] = None
-    valid_bits_per_sample: Optional[int] = None
-    channel_mask: Optional[int] = None  # bitmask
-    speaker_layout: Optional[List[str]] = None
-    sfmt: Optional[SubFormat] = None
-    version: Optional[int] = None
-    pvoc_size: Optional[int] = None
-    word_format: Optional[int] = None
-    analysis_format: Optional[int] = None
-    source_format: Optional[int] = None
-    window_type: Optional[int] = None
-    bin_count: Optional[int] = None
-    window_length: Optional[int] = None
-    overlap: Optional[int] = None
-    frame_align: Optional[int] = None
-    analysis_rate: Optional[float] = None
-    window_param: Optional[float] = None
+    def __getattr__(self, name: str):
+        # Fields of the extended formats are only stored by the formats that have
+        # them, but every format answers for them
+        if name in FORMAT_EXTENSION_FIELDS:
+            return None
+        raise AttributeError(
+            f"'{self.__class__.__name__}' object has no attribute '{name}'"
+        )
 
     def __repr__(self):
         return f"{self.__class__.__name__}({', '.join(f'{field.name}={getattr(self, field.name)}' for field in fields(self) if getattr(self, field.name) is not None)})"
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtendedFormat(PCMFormat):
     """Extended ['fmt '] chunk."""
 
@@ -70,7 +142,7 @@ class ExtendedFormat(PCMFormat):
         return f"{self.__class__.__name__}({', '.join(f'{field.name}={getattr(self, field.name)}' for field in fields(self) if getattr(self, field.name) is not None)})"
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtensibleFormat(ExtendedFormat):
     """Extensible ['fmt '] chunk."""
 
@@ -83,7 +155,7 @@ class ExtensibleFormat(ExtendedFormat):
         return f"{self.__class__.__name__}({', '.join(f'{field.name}={getattr(self, field.name)}' for field in fields(self) if getattr(self, field.name) is not None)})"
 
 
-@dataclass
+@dataclass(slots=True)
 class PEXFormat(ExtensibleFormat):
     """PVOC-EX fields."""
 
@@ -104,19 +176,19 @@ class PEXFormat(ExtensibleFormat):
         return f"{self.__class__.__name__}({', '.join(f'{field.name}={getattr(self, field.name)}' for field in fields(self) if getattr(self, field.name) is not None)})"
 
 
-@dataclass
+@dataclass(slots=True)
 class DataChunk(BaseChunk):
 
     byte_count: int
     frame_count: int
 
 
-@dataclass
+@dataclass(slots=True)
 class FactChunk(BaseChunk):
     samples: int
 
 
-@dataclass
+@dataclass(slots=True)
 class InfoChunk(BaseChunk):
     # fmt: off
     archival_location: Optional[str] = None     # -- IARL [ARCHIVAL LOCATION]
@@ -145,7 +217,7 @@ class InfoChunk(BaseChunk):
     # fmt: on
 
 
-@dataclass
+@dataclass(slots=True)
 class InstrumentChunk(BaseChunk):
     # fmt: off
     unshifted_note: int         # 0 - 127
@@ -158,10 +230,10 @@ class InstrumentChunk(BaseChunk):
     # fmt: on
 
 
-@dataclass
+@dataclass(slots=True)
 class PeakEnvelopeChunk(BaseChunk):
     # fmt: off
-    version: str                # int?
+    version: int
     format: int                 # 1 or 2
     points_per_value: int       # 1 or 2
     block_size: int             # Default: 256
@@ -173,9 +245,30 @@ class PeakEnvelopeChunk(BaseChunk):
     timestamp: str              # size 28 -- YYYY:MM:DD:hh:mm:ss:uuu -- 2000:08:24:13:55:40:967
     reserved: str
     peak_envelope_data: bytes
+    # fmt: on
+
+    @property
+    def peaks(self) -> "np.ndarray":
+        """
+        Peak values shaped (peak_frames, channel_count, points_per_value), as a
+        read-only view of `peak_envelope_data` (requires NumPy).
+        """
+        np = require_numpy()
+
+        dtype = LEVL_DTYPES.get(self.format, None)
+        if dtype is None:
+            raise ValueError(f"Invalid peak envelope format: {self.format}")
+
+        values_per_frame = self.channel_count * self.points_per_value
+        # Any trailing partial peak frame is dropped
+        count = len(self.peak_envelope_data) // np.dtype(dtype).itemsize
+        count -= count % values_per_frame
+
+        values = np.frombuffer(self.peak_envelope_data, dtype=dtype, count=count)
+        return values.reshape(-1, self.channel_count, self.points_per_value)
 
 
-@dataclass
+@dataclass(slots=True)
 class SampleLoop:
     identifier: str
     loop_type: int
@@ -185,7 +278,7 @@ class SampleLoop:
     loop_count: int
 
 
-@dataclass
+@dataclass(slots=True)
 class SampleChunk(BaseChunk):
     # fmt: off
     manufacturer: str           # https://www.recordingblogs.com/wiki/midi-system-exclusive-message
@@ -197,7 +290,7 @@ class SampleChunk(BaseChunk):
     smpte_offset: str           # TODO: I should probably return the raw bits too?
     sample_loop_count: int
     sampler_data_size: int
-    sample_loops: List[SampleLoop]
+    sample_loops: Union[List[SampleLoop], EntryTable]
     sampler_data: Optional[bytes]
     # fmt: on
 
@@ -206,7 +299,7 @@ class SampleChunk(BaseChunk):
 #       The provided explanation MAY be incomplete and MAY not have been confirmed.
 
 
-@dataclass
+@dataclass(slots=True)
 class AcidChunk(BaseChunk):
     properties: str
     # Based on the properties bitmask
@@ -230,7 +323,7 @@ class AcidChunk(BaseChunk):
     tempo: float
 
 
-@dataclass
+@dataclass(slots=True)
 class CartChunk(BaseChunk):
     version: str = ""
     title: str = ""
@@ -258,7 +351,7 @@ class CartChunk(BaseChunk):
             self.post_timers = []
 
 
-@dataclass
+@dataclass(slots=True)
 class AudioID:
     track_index: int
     uid: str
@@ -267,11 +360,11 @@ class AudioID:
     padded: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class ChnaChunk(BaseChunk):
     track_count: int
     uid_count: int
-    track_ids: List[AudioID]
+    track_ids: Union[List[AudioID], EntryTable]
 
 
 # This chunk is completely undocumented and related to ACID.
@@ -282,7 +375,7 @@ class ChnaChunk(BaseChunk):
 # No testing will be created for this chunk.
 
 
-@dataclass
+@dataclass(slots=True)
 class SliceBlock:
     data1: int
     data2: int
@@ -292,7 +385,7 @@ class SliceBlock:
     data4: int
 
 
-@dataclass
+@dataclass(slots=True)
 class StrcChunk(BaseChunk):
 
     unknown1: int
@@ -302,10 +395,10 @@ class StrcChunk(BaseChunk):
     unknown4: int
     unknown5: int
     unknown6: int
-    slice_blocks: List[SliceBlock]
+    slice_blocks: Union[List[SliceBlock], EntryTable]
 
 
-@dataclass
+@dataclass(slots=True)
 class BroadcastChunk(BaseChunk):
 
     # fmt: off
@@ -327,13 +420,13 @@ class BroadcastChunk(BaseChunk):
     # fmt: on
 
 
-@dataclass
+@dataclass(slots=True)
 class DisplayChunk(BaseChunk):
     cftype: int
     data: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CuePoint:
     point_id: str
     position: int
@@ -343,19 +436,19 @@ class CuePoint:
     sample_start: int
 
 
-@dataclass
+@dataclass(slots=True)
 class CueChunk(BaseChunk):
     point_count: int
-    cue_points: List[CuePoint]
+    cue_points: Union[List[CuePoint], EntryTable]
 
 
-@dataclass
+@dataclass(slots=True)
 class LabelNote:
     cue_point_id: str
     data: str
 
 
-@dataclass
+@dataclass(slots=True)
 class LabeledText:
     cue_point_id: str
     sample_length: int
@@ -367,18 +460,18 @@ class LabeledText:
     data: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ADTLChunk(BaseChunk):
 
     sub_chunk_id: str
     ascii_data: Union[LabelNote, LabeledText]
 
 
-@dataclass
+@dataclass(slots=True)
 class XMLChunk(BaseChunk):
     xml: str
 
 
-@dataclass
+@dataclass(slots=True)
 class MD5Chunk(BaseChunk):
     checksum: int
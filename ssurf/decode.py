@@ -1 +1,311 @@
-# .
+from types import ModuleType
+from typing import TYPE_CHECKING, List, Optional, Sequence, Union
+
+from ._types import Byteorder
+from .utils import byteorder_symbol
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Audio formats with a sample decoder
+PCM_FORMAT = 1
+IEEE_FLOAT_FORMAT = 3
+
+# (audio_format, bytes per sample) -> sample kind
+SAMPLE_KINDS = {
+    (PCM_FORMAT, 1): "uint8",
+    (PCM_FORMAT, 2): "int16",
+    (PCM_FORMAT, 3): "int24",
+    (PCM_FORMAT, 4): "int32",
+    (IEEE_FLOAT_FORMAT, 4): "float32",
+    (IEEE_FLOAT_FORMAT, 8): "float64",
+}
+
+
+def require_numpy() -> ModuleType:
+    """
+    Returns the optional NumPy dependency, raising an ImportError if it is missing.
+
+    NumPy is imported on first use rather than with ssurf, so reading chunks never
+    pays for it.
+    """
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "Sample decoding requires NumPy, install it with `pip install ssurf[numpy]`."
+        ) from None
+
+    return numpy
+
+
+class SampleDecoder:
+    """
+    Decodes raw ['data'] frames into (frames, channels) NumPy arrays.
+
+    Supported samples are 8-bit unsigned, 16/24/32-bit signed PCM, and 32/64-bit IEEE
+    float, in either byte order. Integers are returned in their native type, or as
+    float32 in [-1.0, 1.0) when normalized. Samples with fewer valid bits than their
+    container are shifted down to their valid range.
+    """
+
+    def __init__(
+        self,
+        audio_format: int,
+        num_channels: int,
+        block_align: int,
+        bits_per_sample: int,
+        valid_bits_per_sample: Optional[int] = None,
+        byteorder: Byteorder = "little",
+    ):
+        require_numpy()
+
+        if num_channels <= 0 or block_align % num_channels != 0:
+            raise ValueError(
+                f"Invalid block alignment {block_align} for {num_channels} channels."
+            )
+
+        self._audio_format = audio_format
+        self._num_channels = num_channels
+        self._block_align = block_align
+        self._width = block_align // num_channels
+        self._byteorder = byteorder
+
+        kind = SAMPLE_KINDS.get((audio_format, self._width), None)
+        if kind is None:
+            raise ValueError(
+                f"Unsupported sample format: audio format {audio_format} "
+                f"with {self._width * 8}-bit samples."
+            )
+        self._kind = kind
+
+        container_bits = self._width * 8
+        valid_bits = valid_bits_per_sample or bits_per_sample or container_bits
+        if kind.startswith("int") and 0 < valid_bits < container_bits:
+            self._shift = container_bits - valid_bits
+            self._valid_bits = valid_bits
+        else:
+            self._shift = 0
+            self._valid_bits = container_bits
+
+    @property
+    def kind(self) -> str:
+        return self._kind
+
+    @property
+    def num_channels(self) -> int:
+        return self._num_channels
+
+    @property
+    def block_align(self) -> int:
+        return self._block_align
+
+    @property
+    def width(self) -> int:
+        """Bytes per sample."""
+        return self._width
+
+    @property
+    def shift(self) -> int:
+        """Bits that samples are shifted down by, to their valid range."""
+        return self._shift
+
+    @property
+    def byteorder(self) -> Byteorder:
+        return self._byteorder
+
+    def empty(
+        self, frame_count: int, channel_count: int, normalize: bool = False
+    ) -> "np.ndarray":
+        """Allocates an uninitialized array for decoded samples."""
+        np = require_numpy()
+        if normalize:
+            dtype = np.float32
+        elif self.kind == "int24":
+            dtype = np.int32
+        else:
+            dtype = np.dtype(self.kind)
+
+        return np.empty((frame_count, channel_count), dtype=dtype)
+
+    def select(self, channels: Sequence[int]) -> Union[slice, List[int]]:
+        """
+        Validates channel indices, and turns evenly spaced ones into a slice.
+
+        A slice keeps the selection a strided view of the frames, anything else is
+        gathered into a copy of the selected channels only.
+        """
+        channels = [int(channel) for channel in channels]
+        if not channels:
+            raise ValueError("At least one channel must be selected.")
+
+        for channel in channels:
+            if not 0 <= channel < self.num_channels:
+                raise ValueError(
+                    f"Channel {channel} is outside of the {self.num_channels} channels."
+                )
+
+        if len(channels) == 1:
+            return slice(channels[0], channels[0] + 1)
+
+        step = channels[1] - channels[0]
+        if step > 0 and all(
+            current - previous == step
+            for previous, current in zip(channels, channels[1:])
+        ):
+            return slice(channels[0], channels[-1] + 1, step)
+
+        return channels
+
+    def decode(
+        self,
+        buffer: Union[bytes, bytearray, memoryview],
+        normalize: bool = False,
+        channels: Optional[Sequence[int]] = None,
+    ) -> "np.ndarray":
+        """
+        Decodes whole frames from `buffer`, any trailing partial frame is dropped.
+
+        Native samples are returned as a view of `buffer` whenever no conversion is
+        needed, copy the result if the buffer is going to be reused. Samples that do
+        not match the byte order of the machine are swapped as a whole buffer.
+
+        If `channels` is given, only those channels are decoded, in that order.
+        """
+        np = require_numpy()
+        frame_count = len(buffer) // self.block_align
+        raw = np.frombuffer(buffer, dtype=np.uint8, count=frame_count * self.block_align)
+        raw = raw.reshape(frame_count, self.num_channels, self.width)
+
+        if channels is not None:
+            raw = raw[:, self.select(channels), :]
+
+        samples = self.convert(raw)
+
+        if normalize:
+            return self.scale(samples)
+
+        return samples
+
+    def convert(self, raw: "np.ndarray") -> "np.ndarray":
+        """
+        Converts sample bytes, shaped (..., width), into native samples shaped (...).
+        """
+        np = require_numpy()
+        if self.kind == "int24":
+            samples = self._unpack_int24(raw)
+        else:
+            dtype = np.dtype(self.kind).newbyteorder(byteorder_symbol(self.byteorder))
+            # Reinterpreting the contiguous sample bytes keeps strided selections views
+            samples = raw.view(dtype)[..., 0]
+            if not dtype.isnative:
+                samples = samples.astype(dtype.newbyteorder("="))
+
+        if self._shift:
+            samples = samples >> self._shift
+
+        return samples
+
+    def _unpack_int24(self, raw: "np.ndarray") -> "np.ndarray":
+        """Unpacks (..., 3) packed samples into sign-extended int32 samples."""
+        np = require_numpy()
+        if self.byteorder == "big":
+            # Most significant byte first, reversing each triplet makes it little-endian
+            raw = raw[..., ::-1]
+
+        shape = raw.shape[:-1]
+        samples = np.empty(shape, dtype="<i4").reshape(-1)
+        # Place the three bytes in the upper part of each int32, then shift the sign in
+        quads = samples.view(np.uint8).reshape(-1, 4)
+        quads[:, 0] = 0
+        quads[:, 1:] = raw.reshape(-1, 3)
+        samples >>= 8
+
+        return samples.reshape(shape).astype(np.int32, copy=False)
+
+    def scale(self, samples: "np.ndarray") -> "np.ndarray":
+        """Scales decoded samples to float32 in [-1.0, 1.0)."""
+        np = require_numpy()
+        if self.kind == "uint8":
+            return (samples.astype(np.float32) - 128.0) / 128.0
+
+        if self.kind in ("float32", "float64"):
+            return samples.astype(np.float32)
+
+        return samples.astype(np.float32) / float(1 << (self._valid_bits - 1))
+
+
+def memmap(
+    path, offset: int, frame_count: int, decoder: SampleDecoder
+) -> Union["np.memmap", "LazyFrames"]:
+    """
+    Maps `frame_count` frames starting at `offset` of the file at `path`.
+
+    Samples that NumPy can represent directly are mapped as a (frames, channels)
+    `numpy.memmap` of their stored values. 24-bit samples, and samples with fewer
+    valid bits than their container, are returned as `LazyFrames` over the mapped
+    bytes instead, so they hold the same values as `SampleDecoder.decode`.
+    """
+    np = require_numpy()
+
+    if decoder.kind == "int24" or decoder.shift:
+        raw = np.memmap(
+            path,
+            dtype=np.uint8,
+            mode="r",
+            offset=offset,
+            shape=(frame_count, decoder.num_channels, decoder.width),
+        )
+        return LazyFrames(raw, decoder)
+
+    dtype = np.dtype(decoder.kind).newbyteorder(byteorder_symbol(decoder.byteorder))
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        offset=offset,
+        shape=(frame_count, decoder.num_channels),
+    )
+
+
+class LazyFrames:
+    """
+    Array-like (frames, channels) view of samples that need converting, such as 24-bit.
+
+    Indexing reads and decodes only the indexed frames and channels from `raw`, a
+    (frames, channels, width) array of sample bytes (usually a `numpy.memmap`).
+    """
+
+    def __init__(self, raw: "np.ndarray", decoder: SampleDecoder):
+        self._raw = raw
+        self._decoder = decoder
+
+    @property
+    def shape(self) -> tuple:
+        return self._raw.shape[:2]
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    @property
+    def dtype(self) -> "np.dtype":
+        return self._decoder.empty(0, 0).dtype
+
+    def __len__(self) -> int:
+        return self._raw.shape[0]
+
+    def __getitem__(self, key) -> "np.ndarray":
+        if isinstance(key, tuple) and (
+            len(key) > 2 or any(part is Ellipsis for part in key)
+        ):
+            raise IndexError("Frames can only be indexed by frame and channel.")
+
+        return self._decoder.convert(self._raw[key])
+
+    def __array__(self, dtype=None, copy=None) -> "np.ndarray":
+        samples = self[:]
+        return samples if dtype is None else samples.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(shape={self.shape}, dtype={self.dtype})"
@@ -1,15 +1,18 @@
 from io import BytesIO, BufferedReader
+from typing import Optional
 
 from ._errors import UnknownFormatError
 from ._types import Stream
 from .signatures import Identity, SIGNATURES
-from .stream import ByteSource, BinarySource, FileSource
+from .stream import ByteSource, BinarySource, FileSource, MmapSource, read_at
 
 
 class Detect:
 
-    def __init__(self, stream: Stream):
+    def __init__(self, stream: Stream, header: Optional[bytes] = None):
         self._stream = stream
+        # Signatures are matched against the header when it has already been read
+        self._header = header
 
     @property
     def stream(self):
@@ -18,7 +21,8 @@ class Detect:
     def detect(self) -> Identity:
         """Detects the format of the given stream."""
         if not isinstance(
-            self.stream, (BytesIO, BufferedReader, ByteSource, BinarySource, FileSource)
+            self.stream,
+            (BytesIO, BufferedReader, ByteSource, BinarySource, FileSource, MmapSource),
         ):
             raise TypeError("Invalid stream-type: {type(stream)}")
 
@@ -33,15 +37,20 @@ class Detect:
     def surface_detection(self) -> Identity:
         """Perform surface-level file format detection."""
         for signature in SIGNATURES:
-            self.stream.seek(signature.offset)
-            identifier = self.stream.read(signature.size)
+            identifier = read_at(
+                self.stream, signature.offset, signature.size, self._header
+            )
 
             if identifier == signature.identifier[: signature.size]:
                 # Determine if there's a sub-signature/form-type
                 if len(signature.identifier) > signature.size:
                     remaining_bytes = signature.identifier[signature.size :]
-                    self.stream.seek(signature.soffset)
-                    sub_signature = self.stream.read(len(remaining_bytes))
+                    sub_signature = read_at(
+                        self.stream,
+                        signature.soffset,
+                        len(remaining_bytes),
+                        self._header,
+                    )
 
                     if remaining_bytes == sub_signature:
                         return signature.identity
@@ -1 +1,364 @@
-# .
+import hashlib
+import struct
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
+
+from ._constants import (
+    EXTENSIBLE,
+    WAVE_FORMAT_EXTENDED,
+    WAVE_FORMAT_EXTENSIBLE,
+    WAVE_FORMAT_PCM,
+)
+from .decode import IEEE_FLOAT_FORMAT, PCM_FORMAT, SAMPLE_KINDS, require_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Largest size a RIFF size field can hold, anything larger is promoted to RF64
+RIFF_LIMIT = 0xFFFFFFFF
+
+# Size field of RF64 chunks whose true size is stored in ds64
+FALSE_SIZE_FIELD = 0xFFFFFFFF
+
+# ds64 without a table: riff size, data size, sample count (8 bytes each) + table length
+DS64_SIZE = 28
+
+# Trailing 14 bytes of the KSDATAFORMAT_SUBTYPE GUIDs, preceded by the format code
+SUBFORMAT_GUID_TAIL = b"\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71"
+
+
+class SampleEncoder:
+    """
+    Encodes (frames, channels) NumPy arrays into little-endian ['data'] frames.
+
+    Float arrays written to integer samples are treated as normalized to [-1.0, 1.0],
+    integer arrays are written as they are (signed arrays written to 8-bit samples are
+    offset to unsigned). Samples with fewer valid bits than their container are shifted
+    up into the most significant bits.
+    """
+
+    def __init__(
+        self,
+        audio_format: int,
+        num_channels: int,
+        bits_per_sample: int,
+        valid_bits_per_sample: Optional[int] = None,
+    ):
+        self._num_channels = num_channels
+        self._width = (bits_per_sample + 7) // 8
+
+        kind = SAMPLE_KINDS.get((audio_format, self._width), None)
+        if kind is None:
+            raise ValueError(
+                f"Unsupported sample format: audio format {audio_format} "
+                f"with {bits_per_sample}-bit samples."
+            )
+        self._kind = kind
+
+        container_bits = self._width * 8
+        valid_bits = valid_bits_per_sample or bits_per_sample
+        if kind.startswith("int") and 0 < valid_bits < container_bits:
+            self._shift = container_bits - valid_bits
+            self._valid_bits = valid_bits
+        else:
+            self._shift = 0
+            self._valid_bits = container_bits
+
+    @property
+    def kind(self) -> str:
+        return self._kind
+
+    @property
+    def width(self) -> int:
+        """Bytes per sample."""
+        return self._width
+
+    def encode(self, samples: "np.ndarray") -> bytes:
+        """Encodes a (frames, channels) array, or an interleaved 1D array."""
+        np = require_numpy()
+
+        samples = np.asarray(samples)
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, self._num_channels)
+        if samples.ndim != 2 or samples.shape[1] != self._num_channels:
+            raise ValueError(
+                f"Expected (frames, {self._num_channels}) samples, got {samples.shape}."
+            )
+
+        if self.kind in ("float32", "float64"):
+            return samples.astype(np.dtype(self.kind).newbyteorder("<")).tobytes()
+
+        if self.kind == "uint8":
+            if samples.dtype.kind == "f":
+                samples = np.rint(np.clip(samples, -1.0, 1.0) * 127.0) + 128
+            elif samples.dtype.kind == "i":
+                samples = samples.astype(np.int16) + 128
+            return samples.astype(np.uint8).tobytes()
+
+        if samples.dtype.kind == "f":
+            full_scale = float(1 << (self._valid_bits - 1))
+            samples = np.rint(
+                np.clip(samples, -1.0, 1.0) * full_scale
+            ).clip(-full_scale, full_scale - 1)
+
+        samples = samples.astype(np.int64 if self.kind == "int32" else np.int32)
+        if self._shift:
+            samples = samples << self._shift
+
+        if self.kind == "int24":
+            return self._pack_int24(samples)
+
+        return samples.astype(np.dtype(self.kind).newbyteorder("<")).tobytes()
+
+    def _pack_int24(self, samples: "np.ndarray") -> bytes:
+        """Packs int32 samples into three little-endian bytes each."""
+        np = require_numpy()
+        quads = samples.astype("<i4").reshape(-1).view(np.uint8).reshape(-1, 4)
+        return quads[:, :3].tobytes()
+
+
+class Write:
+    """
+    Write a WAVE stream to a file, frame by frame.
+
+    Frames are streamed straight to disk, so memory stays constant regardless of the
+    length of the recording. A ['JUNK'] chunk is reserved ahead of ['fmt '], and if the
+    stream outgrows the 4 GiB RIFF limit, it is turned into a ['ds64'] chunk and the
+    stream is promoted to RF64 (or BW64) when it is closed. With `md5`, frames are
+    hashed as they are written, and an ['MD5 '] chunk is appended after ['data'].
+
+    The ['fmt '] mode is picked from the format unless given: extensible for more than
+    two channels, more than 16 bits or explicit valid bits and channel mask, extended
+    for non-PCM formats, and PCM otherwise.
+    """
+
+    def __init__(
+        self,
+        destination: Union[Path, str],
+        sample_rate: int,
+        num_channels: int,
+        bits_per_sample: int,
+        audio_format: int = PCM_FORMAT,
+        valid_bits_per_sample: Optional[int] = None,
+        channel_mask: Optional[int] = None,
+        mode: Optional[str] = None,
+        large_master: str = "RF64",
+        md5: bool = False,
+    ):
+        if large_master not in ("RF64", "BW64"):
+            raise ValueError(f"Invalid master for large streams: {large_master}")
+
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._bits_per_sample = bits_per_sample
+        self._audio_format = audio_format
+        self._valid_bits_per_sample = valid_bits_per_sample
+        self._channel_mask = channel_mask
+        self._mode = mode or self.pick_mode()
+        self._large_master = large_master
+
+        self._block_align = num_channels * ((bits_per_sample + 7) // 8)
+        self._encoder: Optional[SampleEncoder] = None
+
+        self._data_size = 0
+        self._closed = False
+
+        # Frames are hashed on a single thread, so blocks are hashed in order
+        self._md5 = hashlib.md5() if md5 else None
+        self._hasher = ThreadPoolExecutor(max_workers=1) if md5 else None
+
+        self._stream = open(destination, "wb")
+        try:
+            self.write_header()
+        except Exception:
+            self._stream.close()
+            if self._hasher is not None:
+                self._hasher.shutdown()
+            raise
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def block_align(self) -> int:
+        return self._block_align
+
+    @property
+    def frames_written(self) -> int:
+        return self._data_size // self._block_align
+
+    @property
+    def encoder(self) -> SampleEncoder:
+        """Returns the sample encoder of the stream (requires NumPy)."""
+        if self._encoder is None:
+            self._encoder = SampleEncoder(
+                self._audio_format,
+                self._num_channels,
+                self._bits_per_sample,
+                self._valid_bits_per_sample,
+            )
+
+        return self._encoder
+
+    def pick_mode(self) -> str:
+        if (
+            self._num_channels > 2
+            or self._bits_per_sample > 16
+            or self._valid_bits_per_sample is not None
+            or self._channel_mask is not None
+        ) and self._audio_format in (PCM_FORMAT, IEEE_FLOAT_FORMAT):
+            return WAVE_FORMAT_EXTENSIBLE
+
+        if self._audio_format != PCM_FORMAT:
+            return WAVE_FORMAT_EXTENDED
+
+        return WAVE_FORMAT_PCM
+
+    def format_payload(self) -> bytes:
+        """Builds the ['fmt '] payload."""
+        byte_rate = self._sample_rate * self._block_align
+        audio_format = (
+            EXTENSIBLE if self.mode == WAVE_FORMAT_EXTENSIBLE else self._audio_format
+        )
+        payload = struct.pack(
+            "<HHIIHH",
+            audio_format,
+            self._num_channels,
+            self._sample_rate,
+            byte_rate,
+            self._block_align,
+            self._bits_per_sample,
+        )
+
+        match self.mode:
+            case "WAVE_FORMAT_EXTENDED":
+                payload += struct.pack("<H", 0)
+            case "WAVE_FORMAT_EXTENSIBLE":
+                channel_mask = self._channel_mask
+                if channel_mask is None:
+                    channel_mask = (
+                        (1 << self._num_channels) - 1 if self._num_channels <= 18 else 0
+                    )
+                payload += struct.pack(
+                    "<HHI",
+                    22,
+                    self._valid_bits_per_sample or self._bits_per_sample,
+                    channel_mask,
+                )
+                payload += struct.pack("<H", self._audio_format) + SUBFORMAT_GUID_TAIL
+
+        return payload
+
+    def write_header(self) -> None:
+        """Writes the master, reserved ['JUNK'], ['fmt '], ['fact'] and ['data'] headers."""
+        stream = self._stream
+
+        stream.write(b"RIFF" + struct.pack("<I", 0) + b"WAVE")
+        stream.write(b"JUNK" + struct.pack("<I", DS64_SIZE) + bytes(DS64_SIZE))
+
+        payload = self.format_payload()
+        stream.write(b"fmt " + struct.pack("<I", len(payload)) + payload)
+
+        # Non-PCM formats must carry a ['fact'] chunk
+        self._fact_offset = None
+        if self._audio_format != PCM_FORMAT:
+            self._fact_offset = stream.tell()
+            stream.write(b"fact" + struct.pack("<II", 4, 0))
+
+        self._data_offset = stream.tell()
+        stream.write(b"data" + struct.pack("<I", 0))
+
+    def write_frames(
+        self, frames: Union[bytes, bytearray, memoryview, "np.ndarray"]
+    ) -> None:
+        """
+        Appends frames to the ['data'] chunk.
+
+        Bytes must hold whole interleaved frames. Arrays are encoded with the
+        `SampleEncoder` of the stream.
+        """
+        if self._closed:
+            raise ValueError("Cannot write frames to a closed stream.")
+
+        if isinstance(frames, (bytes, bytearray, memoryview)):
+            size = memoryview(frames).nbytes
+            if size % self._block_align != 0:
+                raise ValueError(
+                    f"{size} bytes is not a whole number of {self._block_align} byte frames."
+                )
+        else:
+            frames = self.encoder.encode(frames)
+            size = len(frames)
+
+        pending = None
+        if self._md5 is not None:
+            # Hashed while the frames are written, both release the GIL
+            pending = self._hasher.submit(self._md5.update, frames)
+
+        self._stream.write(frames)
+        self._data_size += size
+
+        if pending is not None:
+            # The caller may reuse its buffer as soon as this returns
+            pending.result()
+
+    def close(self) -> None:
+        """Pads the ['data'] chunk, finalizes every size field and closes the file."""
+        if self._closed:
+            return
+        self._closed = True
+
+        stream = self._stream
+        try:
+            if self._data_size % 2 != 0:
+                stream.write(b"\x00")
+
+            if self._md5 is not None:
+                stream.write(b"MD5 " + struct.pack("<I", 16) + self._md5.digest())
+
+            riff_size = stream.tell() - 8
+            sample_count = self.frames_written
+
+            if riff_size > RIFF_LIMIT or self._data_size > RIFF_LIMIT:
+                self.promote(riff_size, sample_count)
+            else:
+                stream.seek(4)
+                stream.write(struct.pack("<I", riff_size))
+                stream.seek(self._data_offset + 4)
+                stream.write(struct.pack("<I", self._data_size))
+
+                if self._fact_offset is not None:
+                    stream.seek(self._fact_offset + 8)
+                    stream.write(struct.pack("<I", sample_count))
+        finally:
+            stream.close()
+            if self._hasher is not None:
+                self._hasher.shutdown()
+
+    def promote(self, riff_size: int, sample_count: int) -> None:
+        """Turns the reserved ['JUNK'] chunk into ['ds64'], and the stream into RF64."""
+        stream = self._stream
+
+        stream.seek(0)
+        stream.write(self._large_master.encode("ascii"))
+        stream.write(struct.pack("<I", FALSE_SIZE_FIELD))
+
+        stream.seek(12)
+        stream.write(b"ds64" + struct.pack("<I", DS64_SIZE))
+        stream.write(struct.pack("<QQQI", riff_size, self._data_size, sample_count, 0))
+
+        stream.seek(self._data_offset + 4)
+        stream.write(struct.pack("<I", FALSE_SIZE_FIELD))
+
+        if self._fact_offset is not None:
+            stream.seek(self._fact_offset + 8)
+            stream.write(struct.pack("<I", min(sample_count, FALSE_SIZE_FIELD)))
+
+    def __enter__(self) -> "Write":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,212 @@
+import os
+import struct
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import TYPE_CHECKING, Optional
+
+from ._constants import LEVL_DTYPES, LEVL_FORMAT_UINT8, LEVL_FORMAT_UINT16
+from .chunk_models import PeakEnvelopeChunk
+from .decode import SampleDecoder, require_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .read import Read
+
+# Source: https://tech.ebu.ch/docs/tech/tech3285s3.pdf
+LEVL_VERSION = 0
+
+# Peak values are unsigned absolute values, full scale is the top of their range
+LEVL_MAXIMUM = {LEVL_FORMAT_UINT8: 0xFF, LEVL_FORMAT_UINT16: 0xFFFF}
+
+# Audio frames per peak frame
+DEFAULT_PEAK_BLOCK_SIZE = 256
+
+# Header is followed by the peaks, whose offset counts the chunk header as well
+LEVL_HEADER_SIZE = 120
+LEVL_OFFSET_TO_PEAKS = LEVL_HEADER_SIZE + 8
+
+# dwPosPeakOfPeaks when the position is unknown, or does not fit
+UNKNOWN_PEAK_POSITION = 0xFFFFFFFF
+
+# Bytes of ['data'] read and decoded at a time by each worker, rounded down to whole
+# peak blocks
+SEGMENT_SIZE = 8 * 1024 * 1024
+
+
+def block_peaks(
+    samples: "np.ndarray",
+    block_size: int,
+    points_per_value: int,
+    decoder: SampleDecoder,
+) -> "np.ndarray":
+    """
+    Reduces decoded (frames, channels) samples into (blocks, channels, points) peaks,
+    in [0.0, 1.0]. Two points are the positive then the negative peak, one point is
+    the absolute peak. A trailing partial block is a block of its own.
+
+    Scaling is monotonic, so blocks are reduced in their native type and only the
+    peaks are scaled.
+    """
+    np = require_numpy()
+    frame_count, channel_count = samples.shape
+    block_count = -(-frame_count // block_size)
+
+    full = (frame_count // block_size) * block_size
+    blocks = samples[:full].reshape(-1, block_size, channel_count)
+    maxima = blocks.max(axis=1)
+    minima = blocks.min(axis=1)
+    if full < frame_count:
+        maxima = np.concatenate([maxima, samples[full:].max(axis=0, keepdims=True)])
+        minima = np.concatenate([minima, samples[full:].min(axis=0, keepdims=True)])
+
+    positive = np.clip(decoder.scale(maxima), 0.0, 1.0)
+    negative = np.clip(-decoder.scale(minima), 0.0, 1.0)
+
+    if points_per_value == 1:
+        peaks = np.maximum(positive, negative)[..., np.newaxis]
+    else:
+        peaks = np.stack([positive, negative], axis=-1)
+
+    return peaks.reshape(block_count, channel_count, points_per_value)
+
+
+def segment_peaks(
+    reader: "Read",
+    decoder: SampleDecoder,
+    block_size: int,
+    points_per_value: int,
+    offset: int,
+    start: int,
+    count: int,
+) -> "np.ndarray":
+    """
+    Reads `count` frames from frame `start` of the ['data'] chunk at `offset`, with a
+    positioned read, and reduces them into peaks.
+    """
+    block_align = reader.block_align
+    frames = reader.stream.read_at(offset + start * block_align, count * block_align)
+
+    samples = decoder.decode(frames)
+    return block_peaks(samples, block_size, points_per_value, decoder)
+
+
+def generate(
+    reader: "Read",
+    block_size: int = DEFAULT_PEAK_BLOCK_SIZE,
+    points_per_value: int = 2,
+    format: int = LEVL_FORMAT_UINT16,
+    workers: Optional[int] = None,
+) -> PeakEnvelopeChunk:
+    """
+    Computes the peak envelope of the ['data'] chunk of `reader` in a single pass.
+
+    The frames are split into segments of whole peak blocks, about `SEGMENT_SIZE`
+    bytes each whatever the frame size, which are reduced on a pool of `workers`
+    threads (one per core by default). Segments are read with positioned reads, and
+    reading, decoding and reducing all release the GIL, so they run in parallel.
+    """
+    np = require_numpy()
+
+    if block_size <= 0:
+        raise ValueError(f"Invalid peak block size: {block_size}")
+    if points_per_value not in (1, 2):
+        raise ValueError(f"Invalid points per value: {points_per_value}")
+    if format not in LEVL_MAXIMUM:
+        raise ValueError(f"Invalid peak envelope format: {format}")
+
+    offset, frame_count = reader.frame_span()
+    block_align = reader.block_align
+    decoder = reader.decoder
+
+    segment_frames = max(1, SEGMENT_SIZE // (block_size * block_align)) * block_size
+    starts = range(0, frame_count, segment_frames)
+    counts = [min(segment_frames, frame_count - start) for start in starts]
+
+    reduce = partial(
+        segment_peaks, reader, decoder, block_size, points_per_value, offset
+    )
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        segments = list(executor.map(reduce, starts, counts))
+
+    channel_count = reader.num_channels
+    if segments:
+        peaks = np.concatenate(segments)
+    else:
+        peaks = np.zeros((0, channel_count, points_per_value), dtype=np.float32)
+
+    maximum = LEVL_MAXIMUM[format]
+    values = np.rint(peaks * maximum).astype(LEVL_DTYPES[format])
+
+    return PeakEnvelopeChunk(
+        version=LEVL_VERSION,
+        format=format,
+        points_per_value=points_per_value,
+        block_size=block_size,
+        channel_count=channel_count,
+        frame_count=len(peaks),
+        position=peak_position(reader, peaks, block_size),
+        offset=LEVL_OFFSET_TO_PEAKS,
+        timestamp=datetime.now().strftime("%Y:%m:%d:%H:%M:%S:%f")[:-3],
+        reserved="",
+        peak_envelope_data=values.tobytes(),
+    )
+
+
+def peak_position(reader: "Read", peaks: "np.ndarray", block_size: int) -> int:
+    """Returns the frame of the highest peak, found within its peak block."""
+    np = require_numpy()
+    if len(peaks) == 0:
+        return UNKNOWN_PEAK_POSITION
+
+    block = int(np.argmax(peaks.max(axis=(1, 2))))
+    samples = reader.read_frames(block * block_size, block_size, normalize=True)
+    frame = block * block_size + int(np.argmax(np.abs(samples).max(axis=1)))
+
+    return frame if frame < UNKNOWN_PEAK_POSITION else UNKNOWN_PEAK_POSITION
+
+
+def encode_levl(chunk: PeakEnvelopeChunk) -> bytes:
+    """Builds the ['levl'] payload of a peak envelope, always little-endian."""
+    timestamp = chunk.timestamp.encode("ascii")[:28].ljust(28, b"\x00")
+    reserved = chunk.reserved.encode("latin-1")[:60].ljust(60, b"\x00")
+
+    return (
+        struct.pack(
+            "<IIIIIIII",
+            chunk.version,
+            chunk.format,
+            chunk.points_per_value,
+            chunk.block_size,
+            chunk.channel_count,
+            chunk.frame_count,
+            chunk.position,
+            chunk.offset,
+        )
+        + timestamp
+        + reserved
+        + bytes(chunk.peak_envelope_data)
+    )
+
+
+def resample_peaks(peaks: "np.ndarray", width: int) -> "np.ndarray":
+    """
+    Resamples (peak_frames, channels, points) peaks to `width` pixel buckets.
+
+    Each bucket keeps the highest of the peaks it covers, so no peak is lost when
+    drawing an overview. When there are fewer peaks than buckets, peaks are repeated.
+    """
+    np = require_numpy()
+
+    if width <= 0:
+        raise ValueError(f"Invalid number of buckets: {width}")
+
+    peaks = np.asarray(peaks)
+    if len(peaks) == 0:
+        return np.zeros((width,) + peaks.shape[1:], dtype=peaks.dtype)
+
+    # Start of every bucket, a bucket spans at least one peak frame
+    edges = (np.arange(width) * len(peaks)) // width
+    return np.maximum.reduceat(peaks, edges, axis=0)
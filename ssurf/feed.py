@@ -0,0 +1,463 @@
+import sys
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+from ._constants import ENCODING, FALSE_SIZE, NULL_IDENTIFIER
+from ._errors import UnknownFormatError
+from ._types import Byteorder
+from .chunk import DS64_READ_SIZE, ChunkEntry, is_skipped, parse_ds64
+from .chunk_models import BaseChunk
+from .parse import SIZE_ONLY_IDENTIFIERS, Parse
+from .signatures import SIGNATURES, Identity
+
+# Master identifier, size and form type
+MASTER_HEADER_SIZE = 12
+
+# Chunk identifier and size
+CHUNK_HEADER_SIZE = 8
+
+# List-type at the start of a ['LIST'] payload
+LIST_TYPE_SIZE = 4
+
+# Size written by streaming encoders that could not go back to fill it in,
+# such a ['data'] chunk runs until the end of the stream
+UNKNOWN_SIZE = 0xFFFFFFFF
+
+# What the parser is waiting for
+MASTER = "master"
+HEADER = "header"
+DS64 = "ds64"
+LIST_TYPE = "list-type"
+PAYLOAD = "payload"
+
+
+@dataclass(slots=True)
+class HeaderDetected:
+    """The master chunk was matched against the known signatures."""
+
+    identity: Identity
+    master: str
+    formtype: str
+    byteorder: Byteorder
+    # Size of the master chunk, None when it is stored in ds64
+    size: Optional[int]
+
+
+@dataclass(slots=True)
+class Ds64Parsed:
+    """The ['ds64'] chunk of an RF64 or BW64 stream was read."""
+
+    ds64: dict
+
+
+@dataclass(slots=True)
+class ChunkStarted:
+    """The header of a chunk was read, its payload follows."""
+
+    entry: ChunkEntry
+
+
+@dataclass(slots=True)
+class ChunkFragment:
+    """Part of a payload, `position` bytes into it."""
+
+    entry: ChunkEntry
+    position: int
+    data: memoryview
+
+
+@dataclass(slots=True)
+class ChunkCompleted:
+    """
+    The payload of a chunk was fed in full.
+
+    Collected chunks hold their `payload` and are decoded as `chunk`, as is
+    ['data'], whose size is all that is decoded.
+    """
+
+    entry: ChunkEntry
+    payload: Optional[bytes] = None
+    chunk: Optional[BaseChunk] = None
+
+
+@dataclass(slots=True)
+class StreamEnded:
+    """The stream was closed, `truncated` if it stopped in the middle of a chunk."""
+
+    offset: int
+    truncated: bool
+
+
+Event = Union[
+    HeaderDetected, Ds64Parsed, ChunkStarted, ChunkFragment, ChunkCompleted, StreamEnded
+]
+
+
+def match_signature(header: bytes) -> Identity:
+    """Returns the identity of the master chunk header, as `Detect` would."""
+    for signature in SIGNATURES:
+        identifier = header[signature.offset : signature.offset + signature.size]
+        if identifier != signature.identifier[: signature.size]:
+            continue
+
+        remaining_bytes = signature.identifier[signature.size :]
+        start = signature.soffset
+        if header[start : start + len(remaining_bytes)] == remaining_bytes:
+            return signature.identity
+
+    raise UnknownFormatError(
+        "The provided stream is either corrupted, non-standard, or not WAVE."
+    )
+
+
+class Feed:
+    """
+    Parse a WAVE stream as its bytes arrive, without any I/O (sans-IO).
+
+    Bytes are pushed with `feed`, in pieces of any size, which returns the events
+    they complete: `HeaderDetected`, `Ds64Parsed`, then `ChunkStarted`, any number of
+    `ChunkFragment` and `ChunkCompleted` for every chunk. Fragments are read-only
+    views of the fed bytes, and cover the whole `entry.size` of a chunk (its pad
+    byte included), as `Read.get_chunk_raw` would return it.
+
+    Only chunk headers are buffered. Payloads of chunks that are neither ignored
+    nor larger than `max_eager_payload` are collected as well, and decoded when
+    they complete. The chunk walk follows `Chunk`, with ['data'] sized from ds64.
+    As with `ReaderOptions`, no chunk is ignored by default.
+    """
+
+    def __init__(
+        self,
+        ignore_chunks: Optional[List[str]] = None,
+        only_chunks: Optional[List[str]] = None,
+        max_eager_payload: Optional[int] = None,
+    ):
+        self._ignore_chunks = ignore_chunks if ignore_chunks is not None else []
+        self._only_chunks = only_chunks
+        self._max_eager_payload = max_eager_payload
+
+        self._state = MASTER
+        self._pending = bytearray()
+        self._offset = 0
+        self._closed = False
+
+        # Chunk whose payload is being fed, and how much of it is left (None if it
+        # runs until the end of the stream)
+        self._entry: Optional[ChunkEntry] = None
+        self._remaining: Optional[int] = 0
+        self._position = 0
+        self._emit = True
+        self._collected: Optional[bytearray] = None
+        self._payloads: Dict[int, bytes] = {}
+
+        self.identity: Optional[Identity] = None
+        self.master: Optional[str] = None
+        self.formtype: Optional[str] = None
+        self.byteorder: Optional[Byteorder] = None
+        self.ds64: Optional[dict] = None
+        self.chunks: List[ChunkEntry] = []
+
+        self._parser: Optional[Parse] = None
+
+    @property
+    def offset(self) -> int:
+        """Returns how many bytes were fed so far."""
+        return self._offset
+
+    @property
+    def mode(self) -> Optional[str]:
+        """Returns the format mode, once the ['fmt '] chunk was decoded."""
+        return self._parser.mode if self._parser is not None else None
+
+    @property
+    def current(self) -> Optional[ChunkEntry]:
+        """Returns the chunk whose payload is being fed, if any."""
+        return self._entry if self._state == PAYLOAD else None
+
+    @property
+    def collecting(self) -> bool:
+        """Whether the payload being fed is collected."""
+        return self._state == PAYLOAD and self._collected is not None
+
+    @property
+    def payload_remaining(self) -> Optional[int]:
+        """Returns how much of the current payload is left, None if it is unknown."""
+        return self._remaining if self._state == PAYLOAD else 0
+
+    def needed(self) -> int:
+        """Returns how many bytes complete the header being waited for, if any."""
+        if self._state == PAYLOAD:
+            return 0
+
+        return self.header_size() - len(self._pending)
+
+    def started(self) -> ChunkEntry:
+        """Returns the chunk whose header was read last."""
+        if self._entry is None:
+            raise ValueError("No chunk header was read yet.")
+
+        return self._entry
+
+    def detected(self) -> Tuple[Byteorder, Parse]:
+        """Returns the byte order and the decoder, once the master chunk was read."""
+        if self.byteorder is None or self._parser is None:
+            raise ValueError("The master chunk was not read yet.")
+
+        return self.byteorder, self._parser
+
+    def header_size(self) -> int:
+        """Returns the size of the header being waited for."""
+        if self._state == MASTER:
+            return MASTER_HEADER_SIZE
+        if self._state == DS64:
+            return CHUNK_HEADER_SIZE + self.started().size
+        if self._state == LIST_TYPE:
+            return LIST_TYPE_SIZE
+
+        return CHUNK_HEADER_SIZE
+
+    def feed(self, data: Union[bytes, bytearray, memoryview]) -> List[Event]:
+        """Pushes the next bytes of the stream, and returns the events they complete."""
+        if self._closed:
+            raise ValueError("Cannot feed a closed stream.")
+
+        # Fragments are views of the fed bytes, which must not change afterwards
+        if not isinstance(data, bytes):
+            data = bytes(data)
+
+        events: List[Event] = []
+        view = memoryview(data)
+        position = 0
+        while position < len(view):
+            if self._state == PAYLOAD:
+                position += self.payload(view[position:], events)
+                continue
+
+            take = min(self.needed(), len(view) - position)
+            self._pending += view[position : position + take]
+            self._offset += take
+            position += take
+
+            if self.needed() == 0:
+                header = bytes(self._pending)
+                self._pending.clear()
+                self.advance(header, events)
+
+        return events
+
+    def skip(self, size: int) -> List[Event]:
+        """
+        Moves past `size` bytes of the current payload, which the caller discarded
+        rather than fed. They are neither handed over as fragments nor collected.
+        """
+        if self._state != PAYLOAD or self._collected is not None:
+            raise ValueError(
+                "Only the payload of a chunk that is not collected can be skipped."
+            )
+        if self._remaining is not None and size > self._remaining:
+            raise ValueError(f"Cannot skip {size} bytes, {self._remaining} are left.")
+
+        events: List[Event] = []
+        self._position += size
+        self._offset += size
+        if self._remaining is not None:
+            self._remaining -= size
+            if self._remaining == 0:
+                self.complete(events)
+
+        return events
+
+    def close(self) -> List[Event]:
+        """Ends the stream, and returns the events that the end completes."""
+        if self._closed:
+            return []
+        self._closed = True
+
+        events: List[Event] = []
+        truncated = True
+        if self._state == PAYLOAD and self._remaining is None:
+            # A ['data'] chunk of unknown size ends with the stream
+            self.started().size = self._position
+            self.complete(events)
+            truncated = False
+        elif self._state == PAYLOAD and self._remaining == self.started().padding:
+            # Writers often leave out the final pad byte
+            self.complete(events)
+            truncated = False
+        elif self._state == HEADER and not self._pending:
+            truncated = False
+
+        events.append(StreamEnded(self._offset, truncated))
+        return events
+
+    def advance(self, header: bytes, events: List[Event]) -> None:
+        """Handles a completed header, and moves on to what follows it."""
+        if self._state == MASTER:
+            self.detect(header, events)
+        elif self._state == DS64:
+            byteorder, _ = self.detected()
+            self.ds64 = parse_ds64(header, byteorder)
+            events.append(Ds64Parsed(self.ds64))
+            self._state = HEADER
+        elif self._state == LIST_TYPE:
+            self.started().list_type = sys.intern(header.decode(ENCODING).strip())
+            self.start(events)
+            self.payload(memoryview(header), events, counted=True)
+        else:
+            self.chunk_header(header, events)
+
+    def detect(self, header: bytes, events: List[Event]) -> None:
+        """Matches the master chunk header, an unknown stream raises right away."""
+        self.identity = match_signature(header)
+        self.master = header[:4].decode(ENCODING)
+        self.formtype = header[8:12].decode(ENCODING)
+        self.byteorder = self.identity.endian
+
+        master_size = int.from_bytes(header[4:8], byteorder=self.byteorder)
+        size = None if hex(master_size) == FALSE_SIZE else master_size
+
+        self._parser = Parse([], self.byteorder, self.fetch)
+        events.append(
+            HeaderDetected(
+                self.identity, self.master, self.formtype, self.byteorder, size
+            )
+        )
+        self._state = HEADER
+
+    def chunk_header(self, header: bytes, events: List[Event]) -> None:
+        """Sizes the chunk whose header was read, as `Chunk` would walk it."""
+        byteorder, _ = self.detected()
+        chunk_identifier = header[:4].decode(ENCODING)
+        chunk_size = int.from_bytes(header[4:], byteorder=byteorder)
+        offset = self._offset - CHUNK_HEADER_SIZE
+
+        unbounded = False
+        if chunk_identifier == "ds64" and offset == MASTER_HEADER_SIZE:
+            if chunk_size < DS64_READ_SIZE - CHUNK_HEADER_SIZE:
+                raise ValueError("The ['ds64'] chunk is truncated.")
+            # Read whole, along with its header, then parsed
+            self._entry = ChunkEntry(
+                "ds64", offset, offset + CHUNK_HEADER_SIZE, chunk_size
+            )
+            self._pending += header
+            self._state = DS64
+            return
+
+        if chunk_identifier == "data" and self.ds64 is not None:
+            chunk_size = self.ds64["data_low_size"] + (
+                self.ds64["data_high_size"] << 32
+            )
+        elif chunk_identifier == "data" and chunk_size == UNKNOWN_SIZE:
+            unbounded = True
+
+        # As in `Chunk`, odd sized ['bext'] chunks are not padded
+        padding = 0
+        if chunk_size % 2 != 0 and chunk_identifier != "bext" and not unbounded:
+            padding = 1
+            chunk_size += 1
+
+        self._entry = ChunkEntry(
+            identifier=sys.intern(chunk_identifier),
+            header_offset=offset,
+            payload_offset=offset + CHUNK_HEADER_SIZE,
+            size=chunk_size,
+            padding=padding,
+        )
+        self._remaining = None if unbounded else chunk_size
+        # Null chunks of RF64 streams are walked over, as by `Chunk`
+        self._emit = not (self.ds64 is not None and chunk_identifier == NULL_IDENTIFIER)
+
+        if chunk_identifier == "LIST" and chunk_size >= LIST_TYPE_SIZE:
+            self._state = LIST_TYPE
+            return
+
+        self.start(events)
+
+    def start(self, events: List[Event]) -> None:
+        """Starts the payload of the current chunk."""
+        entry = self.started()
+        self._state = PAYLOAD
+        self._position = 0
+
+        self._collected = None
+        if self._emit and self.collects(entry):
+            self._collected = bytearray()
+
+        if self._emit:
+            self.chunks.append(entry)
+            events.append(ChunkStarted(entry))
+
+        if self._remaining == 0:
+            self.complete(events)
+
+    def collects(self, entry: ChunkEntry) -> bool:
+        """Whether the payload of a chunk is gathered and decoded."""
+        # ['data'] is decoded from its size, its payload is only ever handed over
+        if entry.identifier in SIZE_ONLY_IDENTIFIERS:
+            return False
+
+        if is_skipped(entry, self._ignore_chunks, self._only_chunks):
+            return False
+
+        # As with `Chunk.deferred`, ['fmt '] is always needed
+        return (
+            self._max_eager_payload is None
+            or entry.identifier == "fmt "
+            or entry.size <= self._max_eager_payload
+        )
+
+    def payload(
+        self, view: memoryview, events: List[Event], counted: bool = False
+    ) -> int:
+        """
+        Hands over as much of the current payload as `view` holds, and returns how
+        much that is. `counted` bytes were already fed as part of a header.
+        """
+        take = len(view) if self._remaining is None else min(self._remaining, len(view))
+        fragment = view[:take]
+
+        if self._emit and take:
+            events.append(ChunkFragment(self.started(), self._position, fragment))
+        if self._collected is not None:
+            self._collected += fragment
+
+        self._position += take
+        if not counted:
+            self._offset += take
+
+        if self._remaining is not None:
+            self._remaining -= take
+            if self._remaining == 0:
+                self.complete(events)
+
+        return take
+
+    def complete(self, events: List[Event]) -> None:
+        """Completes the current chunk, and decodes it if it was collected."""
+        entry = self.started()
+        self._state = HEADER
+        if not self._emit:
+            return
+
+        payload = None
+        if self._collected is not None:
+            payload = bytes(self._collected)
+            self._collected = None
+            self._payloads[entry.header_offset] = payload
+
+        chunk = None
+        if payload is not None or entry.identifier in SIZE_ONLY_IDENTIFIERS:
+            _, parser = self.detected()
+            parser.add(entry)
+            # ['fmt '] is kept, as decoding ['data'] asks for it
+            if entry.identifier == "fmt ":
+                chunk = parser.get("fmt ")
+            else:
+                chunk = parser.decode(entry)
+
+        events.append(ChunkCompleted(entry, payload, chunk))
+
+    def fetch(self, entry: ChunkEntry) -> bytes:
+        """Hands a collected payload over to the decoder, which reads it only once."""
+        return self._payloads.pop(entry.header_offset)
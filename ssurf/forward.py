@@ -0,0 +1,338 @@
+from collections import deque
+from typing import TYPE_CHECKING, BinaryIO, Dict, Generator, List, Optional, Union
+
+from ._types import Payload, Source
+from .chunk import ChunkEntry
+from .chunk_models import BaseChunk
+from .decode import SampleDecoder
+from .feed import (
+    ChunkCompleted,
+    ChunkFragment,
+    ChunkStarted,
+    Ds64Parsed,
+    Event,
+    Feed,
+    HeaderDetected,
+    StreamEnded,
+)
+from .read import (
+    DEFAULT_BLOCK_FRAMES,
+    DEFAULT_ROPTS,
+    FormatReader,
+    format_reader,
+    sample_decoder,
+)
+from .settings import ReaderOptions
+from .signatures import Identity
+from .stream import ForwardSource
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Bytes read from the stream at a time, outside of the ['data'] frames
+FORWARD_READ_SIZE = 64 * 1024
+
+
+class ReadForward:
+    """
+    Read a WAVE stream front to back, without ever seeking.
+
+    Meant for pipes, stdin and sockets (`ffmpeg ... -f wav - | tool`). Opening the
+    stream reads it up to the start of the ['data'] chunk, so the format and the
+    metadata chunks before it are known. Frames are then streamed by `iter_blocks`,
+    once. Chunks that follow ['data'] are read after its frames, or by `finish`.
+
+    Payloads that are neither decoded nor streamed (ignored chunks, or chunks larger
+    than `max_eager_payload`) are read and discarded in bounded blocks. The size of
+    the stream is taken from the master chunk or ds64, rather than from the stream.
+    """
+
+    def __init__(
+        self,
+        source: Union[Source, BinaryIO],
+        options: ReaderOptions = DEFAULT_ROPTS,
+    ):
+        self._stream = ForwardSource(source)
+        self._feed = Feed(
+            ignore_chunks=options.ignore_chunks,
+            only_chunks=options.only_chunks,
+            max_eager_payload=options.max_eager_payload,
+        )
+
+        self._identity: Optional[Identity] = None
+        self._master: Optional[str] = None
+        self._formtype: Optional[str] = None
+        self._ds64: Optional[dict] = None
+        self._file_size: Optional[int] = None
+        self._table: List[ChunkEntry] = []
+        self._decoded: Dict[str, BaseChunk] = {}
+        self._raw: Dict[str, tuple] = {}
+        self._reader: Optional[FormatReader] = None
+        self._decoder: Optional[SampleDecoder] = None
+
+        # Fragments of ['data'] read before they were asked for
+        self._frames = deque()
+        self._data: Optional[ChunkEntry] = None
+        self._data_complete = False
+        # Frames were streamed, or are no longer wanted
+        self._consumed = False
+        self._discarding = False
+        self._ended = False
+        self._truncated = False
+
+        try:
+            while self._data is None and not self._ended:
+                self.handle(self.pull())
+
+            if self._reader is None:
+                raise ValueError(
+                    "The stream does not contain a ['fmt '] chunk before its audio."
+                )
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Releases the underlying stream, if it was opened from a file path."""
+        self._stream.close()
+
+    def __enter__(self) -> "ReadForward":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # --- Walking
+
+    def pull(self, size: int = FORWARD_READ_SIZE) -> List[Event]:
+        """
+        Moves the stream forward, and returns the events of the parser.
+
+        The rest of a payload that is not needed is discarded in bounded blocks,
+        anything else is read `size` bytes at a time and fed to the parser.
+        """
+        feed = self._feed
+        entry = feed.current
+        remaining = feed.payload_remaining
+        if (
+            entry is not None
+            and remaining
+            and not feed.collecting
+            and (entry.identifier != "data" or self._discarding)
+        ):
+            skipped = self._stream.skip(remaining)
+            events = feed.skip(skipped)
+            if skipped < remaining:
+                events += feed.close()
+            return events
+
+        data = self._stream.read(size)
+        if not data:
+            return feed.close()
+
+        return feed.feed(data)
+
+    def handle(self, events: List[Event]) -> None:
+        """Keeps what the events of the parser tell about the stream."""
+        for event in events:
+            match event:
+                case ChunkFragment(entry=entry, data=data):
+                    if entry.identifier == "data" and not self._discarding:
+                        self._frames.append(data)
+
+                case HeaderDetected():
+                    self._identity = event.identity
+                    self._master = event.master
+                    self._formtype = event.formtype
+                    if event.size is not None:
+                        self._file_size = event.size + 8
+
+                case Ds64Parsed(ds64=ds64):
+                    self._ds64 = ds64
+                    riff_size = ds64["riff_low_size"] + (ds64["riff_high_size"] << 32)
+                    self._file_size = riff_size + 8
+
+                case ChunkStarted(entry=entry):
+                    self._table.append(entry)
+                    if entry.identifier == "data" and self._data is None:
+                        self._data = entry
+
+                case ChunkCompleted(entry=entry):
+                    self.complete(event)
+
+                case StreamEnded():
+                    self._ended = True
+                    self._truncated = event.truncated
+
+    def complete(self, event: ChunkCompleted) -> None:
+        """Keeps a completed chunk, along with its payload if it was collected."""
+        entry = event.entry
+        identifier = entry.list_type if entry.identifier == "LIST" else entry.identifier
+        payload = event.payload if event.payload is not None else b""
+        self._raw[identifier] = (entry.size, payload)
+
+        if event.chunk is not None:
+            self._decoded[identifier] = event.chunk
+
+        if identifier == "fmt " and self._reader is None:
+            self._reader = format_reader(self._feed.mode, event.chunk)
+        elif entry is self._data:
+            self._data_complete = True
+
+    def finish(self) -> None:
+        """
+        Reads the rest of the stream, so chunks that follow ['data'] are known.
+
+        Frames that were not streamed yet are discarded.
+        """
+        self._consumed = self._discarding = True
+        self._frames.clear()
+        while not self._ended:
+            self.handle(self.pull())
+
+    # --- WAVE-specific accessible information
+
+    @property
+    def stream(self):
+        """Returns the normalized stream of the source."""
+        return self._stream
+
+    @property
+    def file_size(self) -> Optional[int]:
+        """
+        Returns the size of the WAVE file in bytes, as stated by its master chunk or
+        ds64, or None when the writer left it unknown.
+        """
+        return self._file_size
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the stream ended in the middle of a chunk."""
+        return self._truncated
+
+    @property
+    def byteorder(self) -> str:
+        return self._identity.endian
+
+    @property
+    def identity(self) -> Identity:
+        return self._identity
+
+    @property
+    def master(self) -> str:
+        return self._master
+
+    @property
+    def formtype(self) -> str:
+        return self._formtype
+
+    @property
+    def ds64(self) -> Optional[dict]:
+        return self._ds64
+
+    @property
+    def chunks(self) -> List[ChunkEntry]:
+        """Returns the chunks walked so far."""
+        return self._table
+
+    @property
+    def chunk_list(self) -> List[str]:
+        """Returns the identifiers of the chunks walked so far."""
+        return [entry.identifier for entry in self._table]
+
+    def has_chunk(self, chunk_identifier: str) -> bool:
+        """Returns whether the specified chunk was walked so far."""
+        return chunk_identifier in self.chunk_list
+
+    def all(self) -> dict:
+        """Returns every chunk decoded so far."""
+        return dict(self._decoded)
+
+    def get_chunk(self, chunk_identifier: str) -> Optional[BaseChunk]:
+        """Returns the decoded chunk, if it was read so far."""
+        return self._decoded.get(chunk_identifier, None)
+
+    def get_chunk_raw(self, chunk_identifier: str) -> Optional[tuple]:
+        """Returns the size and payload of a chunk, empty if it was not collected."""
+        return self._raw.get(chunk_identifier, None)
+
+    # --- Audio frames
+
+    @property
+    def decoder(self) -> SampleDecoder:
+        """Returns the sample decoder of the stream (requires NumPy)."""
+        if self._decoder is None:
+            self._decoder = sample_decoder(self._reader, self.byteorder)
+
+        return self._decoder
+
+    def iter_blocks(
+        self,
+        frames_per_block: int = DEFAULT_BLOCK_FRAMES,
+        decode: bool = False,
+        normalize: bool = False,
+    ) -> Generator[Union[Payload, "np.ndarray"], None, None]:
+        """
+        Yields the ['data'] chunk in blocks of `frames_per_block` frames, as they
+        arrive. The last block holds whatever whole frames are left.
+
+        Frames can only be streamed once. `decode` and `normalize` yield decoded
+        arrays instead, as in `Read.read_frames`. Once the frames are exhausted, the
+        rest of the stream is read, so the chunks that follow are known.
+        """
+        if frames_per_block <= 0:
+            raise ValueError(f"Invalid frames per block: {frames_per_block}")
+        if self._consumed:
+            raise ValueError(
+                "The frames of a forward-only stream can only be read once."
+            )
+        self._consumed = True
+        if self._data is None:
+            return
+
+        block_align = self._reader.block_align
+        block_size = frames_per_block * block_align
+
+        # The pad byte of an odd sized ['data'] chunk is not part of any frame, a
+        # ['data'] chunk of unknown size runs until the end of the stream
+        entry = self._data
+        available = None
+        if self._feed.current is not entry or self._feed.payload_remaining is not None:
+            available = (entry.size - entry.padding) // block_align * block_align
+
+        pending = bytearray()
+        while True:
+            while self._frames:
+                pending += self._frames.popleft()
+
+            done = self._data_complete or self._ended
+            while len(pending) >= block_size or (done and pending):
+                size = min(block_size, len(pending))
+                if done and size < block_size:
+                    size -= size % block_align
+                if available is not None:
+                    size = min(size, available)
+                    available -= size
+                if size <= 0:
+                    break
+
+                block = bytes(pending[:size])
+                del pending[:size]
+                if decode or normalize:
+                    yield self.decoder.decode(block, normalize=normalize)
+                else:
+                    yield block
+
+            if done:
+                break
+            self.handle(self.pull(max(block_size, FORWARD_READ_SIZE)))
+
+        self.finish()
+
+    def __getattr__(self, item):
+        """Delegates access to the actual reader."""
+        if item.startswith("_"):
+            raise AttributeError(item)
+        if self._reader is None:
+            raise AttributeError("Reader not initialized.")
+        return getattr(self._reader, item)
@@ -2,11 +2,16 @@ from io import BufferedReader, BytesIO
 from pathlib import Path
 
 from ._types import Source, Stream
-from .stream import BinarySource, ByteSource, FileSource
+from .stream import BinarySource, ByteSource, FileSource, MmapSource
 
 
-def normalize_stream(source: Source) -> Stream:
-    """Normalizes source input into a stream."""
+def normalize_stream(source: Source, memory_map: bool = False) -> Stream:
+    """
+    Normalizes source input into a stream.
+
+    If `memory_map` is set, file paths are memory-mapped rather than opened.
+    Empty files cannot be mapped and fall back to a regular file handle.
+    """
 
     if isinstance(source, (BufferedReader, BytesIO)):
         return BinarySource(source)
@@ -15,6 +20,11 @@ def normalize_stream(source: Source) -> Stream:
         return ByteSource(source)
 
     elif isinstance(source, (str, Path)) and Path(source).is_file():
+        if memory_map:
+            try:
+                return MmapSource(source)
+            except ValueError:
+                pass
         return FileSource(source)
 
     else:
@@ -1,9 +1,12 @@
-from ._constants import DEFAULT_ENCODING
+import threading
+
+from typing import Callable, Dict, List, Optional
 
 # from ._errors import PerverseError
-from ._types import Byteorder
+from ._types import Byteorder, Payload
+from .chunk import ChunkEntry, DeferredPayload
 from .chunk_decoders import CKDecoder
-from .chunk_models import GenericChunk
+from .chunk_models import BaseChunk, GenericChunk
 from .utils import byteorder_symbol
 
 # Source: https://tech.ebu.ch/docs/tech/tech3285s3.pdf
@@ -35,17 +38,71 @@ STRC_IDENTIFIER = "strc"
 
 LIST_TYPES = [ADTL_IDENTIFIER, INFO_IDENTIFIER]
 
+# Chunks decoded from their size alone, their payload is never read
+SIZE_ONLY_IDENTIFIERS = [DATA_IDENTIFIER]
+
+# Chunks with a dedicated decoder, anything else is kept as a GenericChunk
+DECODED_IDENTIFIERS = [
+    ACID_IDENTIFIER,
+    AXML_IDENTIFIER,
+    BEXT_IDENTIFIER,
+    CART_IDENTIFIER,
+    CHNA_IDENTIFIER,
+    CUE_IDENTIFIER,
+    DATA_IDENTIFIER,
+    DISP_IDENTIFIER,
+    FACT_IDENTIFIER,
+    FMT_IDENTIFIER,
+    INFO_IDENTIFIER,
+    INST_IDENTIFIER,
+    IXML_IDENTIFIER,
+    LEVL_IDENTIFIER,
+    MD5_IDENTIFIER,
+    PMX_IDENTIFIER,
+    SMPL_IDENTIFIER,
+    STRC_IDENTIFIER,
+]
+
 
 class Parse:
-    def __init__(self, chunks: dict, byteorder: Byteorder):
-        self._chunks = chunks
+    """
+    Decodes chunks on demand.
+
+    Every chunk is decoded the first time it is requested, and the result is cached.
+    Concurrent requests for the same chunk decode it once, while different chunks are
+    decoded side by side.
+    Skipped chunks are only decoded if they need no payload, either because their
+    size is all that is decoded, or because they default to a `GenericChunk`.
+    Deferred chunks are never decoded, they are kept as a `GenericChunk` holding
+    the `DeferredPayload`.
+    """
+
+    def __init__(
+        self,
+        chunks: List[ChunkEntry],
+        byteorder: Byteorder,
+        fetch: Callable[[ChunkEntry], Payload],
+        skipped: Optional[Callable[[ChunkEntry], bool]] = None,
+        columnar: bool = False,
+    ):
+        self._chunks = []
         self._byteorder = byteorder
+        self._fetch = fetch
+        self._skipped = skipped
 
-        self._mode = None
-        self._sanity = []
+        # Initialize chunk decoders
+        self._ckdec = CKDecoder(byteorder, byteorder_symbol(byteorder), columnar)
+        self._decoded = {}
+        # Many threads may ask for the same chunk, it is only decoded once. Each
+        # chunk has its own lock, so different chunks are decoded at the same time.
+        self._locks: Dict[str, threading.Lock] = {}
+
+        self._entries = {}
+        for entry in chunks:
+            self.add(entry)
 
     @property
-    def chunks(self) -> dict:
+    def chunks(self) -> List[ChunkEntry]:
         return self._chunks
 
     @property
@@ -54,88 +111,161 @@ class Parse:
 
     @property
     def mode(self) -> str:
-        return self._mode
+        return self._ckdec.mode
 
     @property
     def sanity(self) -> []:
-        return self._sanity
-
-    def deparse(self):
-        true_chunks = {}
-
-        sign = byteorder_symbol(self.byteorder)
-
-        # Initialize chunk decoders
-        ckdec = CKDecoder(self.byteorder, sign)
-        for identifier, size, payload in self.chunks:
-            if identifier == LIST_IDENTIFIER:
-                # Determine the list-type and overwrite
-                identifier = payload[:4].decode(DEFAULT_ENCODING).strip()
-                size -= 12
+        return self._ckdec.sanity
+
+    def add(self, entry: ChunkEntry) -> None:
+        """Adds a chunk to the table, such as one found after the parser was created."""
+        self._chunks.append(entry)
+
+        # ['LIST'] chunks are known by their list-type
+        identifier = entry.identifier
+        if identifier == LIST_IDENTIFIER:
+            identifier = entry.list_type
+        self._entries[identifier] = entry
+        self._locks.setdefault(identifier, threading.Lock())
+
+    def clear(self) -> None:
+        """Drops every decoded chunk, along with the payloads they hold."""
+        self._decoded = {}
+
+    def get(self, identifier: str) -> Optional[BaseChunk]:
+        """Returns the decoded chunk, or None if the stream does not contain it."""
+        if identifier in self._decoded:
+            return self._decoded[identifier]
+
+        entry = self._entries.get(identifier, None)
+        if entry is None:
+            return None
+
+        if (
+            self._skipped is not None
+            and self._skipped(entry)
+            and identifier in DECODED_IDENTIFIERS
+            and identifier not in SIZE_ONLY_IDENTIFIERS
+        ):
+            return None
+
+        with self._locks[identifier]:
+            # Decoded by another thread while this one waited
+            if identifier in self._decoded:
+                return self._decoded[identifier]
+
+            decoded = self.decode(entry)
+            self._decoded[identifier] = decoded
+
+        return decoded
+
+    def pending(self) -> List[ChunkEntry]:
+        """Returns the chunks that are yet to be decoded, and need their payload."""
+        return [
+            entry
+            for identifier, entry in self._entries.items()
+            if identifier not in self._decoded
+            and entry.identifier not in SIZE_ONLY_IDENTIFIERS
+            and not (self._skipped is not None and self._skipped(entry))
+        ]
+
+    def deparse(self) -> Dict[str, BaseChunk]:
+        """Decodes every chunk in the stream that is not skipped."""
+        decoded = {identifier: self.get(identifier) for identifier in self._entries}
+        return {
+            identifier: chunk
+            for identifier, chunk in decoded.items()
+            if chunk is not None
+        }
+
+    def decode(self, entry: ChunkEntry) -> BaseChunk:
+        """Decodes a single chunk."""
+        ckdec = self._ckdec
+
+        identifier = entry.identifier
+        size = entry.size
+        # Payloads are only fetched for chunks that need them
+        if identifier in SIZE_ONLY_IDENTIFIERS:
+            payload = b""
+        else:
+            payload = self._fetch(entry)
+
+        deferred = isinstance(payload, DeferredPayload)
+
+        if identifier == LIST_IDENTIFIER:
+            # Overwrite with the list-type found while walking
+            identifier = entry.list_type
+            size -= 12
+            if not deferred:
                 payload = payload[4:]
 
-            # Decode each payload
-            match identifier:
-                case "acid":
-                    true_chunks[ACID_IDENTIFIER] = ckdec.decode_acid(payload)
+        # Memory-mapped payloads are views, decoders work on small copies
+        if identifier in DECODED_IDENTIFIERS and isinstance(payload, memoryview):
+            payload = payload.tobytes()
+
+        # Decode the payload
+        match identifier:
+            case _ if deferred:
+                chunk = GenericChunk(payload=payload)
 
-                case "aXML" | "iXML" | "_PMX":
-                    true_chunks[identifier] = ckdec.decode_xml(payload)
+            case "acid":
+                chunk = ckdec.decode_acid(payload)
 
-                case "bext":
-                    true_chunks[BEXT_IDENTIFIER] = ckdec.decode_bext(payload)
+            case "aXML" | "iXML" | "_PMX":
+                chunk = ckdec.decode_xml(payload)
 
-                case "cart":
-                    true_chunks[CART_IDENTIFIER] = ckdec.decode_cart(payload, size)
+            case "bext":
+                chunk = ckdec.decode_bext(payload)
 
-                case "chna":
-                    true_chunks[CHNA_IDENTIFIER] = ckdec.decode_chna(payload)
+            case "cart":
+                chunk = ckdec.decode_cart(payload, size)
 
-                case "cue ":
-                    true_chunks[CUE_IDENTIFIER] = ckdec.decode_cue(payload)
+            case "chna":
+                chunk = ckdec.decode_chna(payload)
 
-                case "data":
-                    true_chunks[DATA_IDENTIFIER] = ckdec.decode_data(payload, size)
+            case "cue ":
+                chunk = ckdec.decode_cue(payload)
 
-                case "DISP":
-                    true_chunks[DISP_IDENTIFIER] = ckdec.decode_disp(payload)
+            case "data":
+                chunk = ckdec.decode_data(payload, size)
 
-                case "fact":
-                    true_chunks[FACT_IDENTIFIER] = ckdec.decode_fact(payload)
+                fmt = self.get(FMT_IDENTIFIER)
+                if fmt:
+                    # The pad byte of an odd sized chunk is not part of any frame
+                    byte_count = chunk.byte_count - entry.padding
+                    chunk.frame_count = int(byte_count / fmt.block_align)
 
-                case "fmt ":
-                    true_chunks[FMT_IDENTIFIER] = ckdec.decode_fmt(payload, size)
+            case "DISP":
+                chunk = ckdec.decode_disp(payload)
 
-                case "INFO":
-                    true_chunks[INFO_IDENTIFIER] = ckdec.decode_info(payload)
+            case "fact":
+                chunk = ckdec.decode_fact(payload)
 
-                case "inst":
-                    true_chunks[INST_IDENTIFIER] = ckdec.decode_inst(payload)
+            case "fmt ":
+                chunk = ckdec.decode_fmt(payload, size)
 
-                case "levl":
-                    true_chunks[LEVL_IDENTIFIER] = ckdec.decode_levl(payload)
+            case "INFO":
+                chunk = ckdec.decode_info(payload)
 
-                case "MD5 ":
-                    true_chunks[MD5_IDENTIFIER] = ckdec.decode_md5(payload)
+            case "inst":
+                chunk = ckdec.decode_inst(payload)
 
-                case "smpl":
-                    true_chunks[SMPL_IDENTIFIER] = ckdec.decode_smpl(payload)
+            case "levl":
+                chunk = ckdec.decode_levl(payload)
 
-                case "strc":
-                    true_chunks[STRC_IDENTIFIER] = ckdec.decode_strc(payload)
+            case "MD5 ":
+                chunk = ckdec.decode_md5(payload)
 
-                case _:
-                    true_chunks[identifier] = GenericChunk(payload=payload)
+            case "smpl":
+                chunk = ckdec.decode_smpl(payload)
 
-            true_chunks[identifier].identifier = identifier
-            true_chunks[identifier].size = size
+            case "strc":
+                chunk = ckdec.decode_strc(payload)
 
-        if true_chunks["fmt "] and true_chunks["data"]:
-            true_chunks["data"].frame_count = int(
-                true_chunks["data"].byte_count / true_chunks["fmt "].block_align
-            )
+            case _:
+                chunk = GenericChunk(payload=payload)
 
-        self._mode = ckdec.mode
-        self._sanity = ckdec.sanity
+        chunk.identifier = identifier
+        chunk.size = size
 
-        return true_chunks
+        return chunk
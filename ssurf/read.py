@@ -1,21 +1,43 @@
-from typing import List, Protocol, Union
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Generator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from ._constants import ENCODING_CODES
-from ._types import Source, Stream
-from .chunk import Chunk
+from ._constants import ENCODING_CODES, SPEAKER_ABBREVIATIONS
+from ._types import Payload, Source, Stream
+from .cache import CACHE_ERRORS, IndexCache
+from .checksum import HASH_BLOCK_SIZE, md5_span
+from .chunk import Chunk, ChunkEntry, DeferredPayload
 from .chunk_models import (
     ExtendedFormat,
     ExtensibleFormat,
     PCMFormat,
     PEXFormat,
+    PeakEnvelopeChunk,
 )
+from .decode import LazyFrames, SampleDecoder, memmap
 from .detect import Detect
+from .envelope import DEFAULT_PEAK_BLOCK_SIZE, LEVL_FORMAT_UINT16, generate
 from .normalize import normalize_stream
 from .parse import Parse
 from .settings import ReaderOptions
 from .signatures import Identity
+from .stream import MmapSource, read_header
+
+if TYPE_CHECKING:
+    import numpy as np
 
-DEFAULT_ROPTS = ReaderOptions(ignore_chunks=[])
+DEFAULT_ROPTS = ReaderOptions()
+
+# Default number of frames per block when iterating over the ['data'] chunk
+DEFAULT_BLOCK_FRAMES = 65536
 
 
 class FormatReader(Protocol):
@@ -253,73 +275,225 @@ class PEXReader(ExtensibleReader):
             )
 
 
+def format_reader(mode: str, format: PCMFormat) -> Optional[FormatReader]:
+    """Returns the reader matching the mode of a decoded ['fmt '] chunk."""
+    # Could just use class name
+    match mode:
+        case "WAVE_FORMAT_PCM":
+            return PCMReader(format)
+        case "WAVE_FORMAT_EXTENDED":
+            return ExtendedReader(format)
+        case "WAVE_FORMAT_EXTENSIBLE":
+            return ExtensibleReader(format)
+        case "WAVE_FORMAT_PVOC_EX":
+            return PEXReader(format)
+
+
+def sample_decoder(reader: FormatReader, byteorder: str) -> SampleDecoder:
+    """Returns the sample decoder of a format reader (requires NumPy)."""
+    return SampleDecoder(
+        audio_format=reader.audio_format,
+        num_channels=reader.num_channels,
+        block_align=reader.block_align,
+        bits_per_sample=reader.bits_per_sample,
+        valid_bits_per_sample=getattr(reader, "valid_bits_per_sample", None),
+        byteorder=byteorder,
+    )
+
+
 class Read:
     """Read and retrieve information from a WAVE stream."""
 
     def __init__(self, source: Source, options: ReaderOptions = DEFAULT_ROPTS):
         self._source = source
         self._ignore = options.ignore_chunks
-        # Validate the stream
-        self._identity = self.initialize_validator()
-        self._chunks = self.initialize_chunks()
-        self._parsed = self.initialize_parser()
-        self._reader = self.initialize_reader()
+        self._only = options.only_chunks
+        self._max_eager = options.max_eager_payload
+        self._columnar = options.columnar_tables
+        self._index = (
+            IndexCache(options.index_cache) if options.index_cache is not None else None
+        )
+        # A single handle is shared by every stage, and released by close()
+        self._stream = normalize_stream(source, memory_map=options.memory_map)
+        self._decoder: Optional[SampleDecoder] = None
+        try:
+            self._file_size = len(self._stream)
+            # Validate and walk the stream, unless its chunk table is indexed
+            if not self.restore_index():
+                header = self.read_header()
+                self._identity = self.initialize_validator(header)
+                self._chunks = self.initialize_chunks(header)
+                self.store_index()
+            self._parser = self.initialize_parser()
+            self._reader = self.initialize_reader()
+        except Exception:
+            self.close()
+            raise
 
     @property
     def stream(self) -> Stream:
-        """Returns a normalized stream from the source."""
-        return normalize_stream(self._source)
+        """Returns the normalized stream of the source."""
+        return self._stream
 
     @property
     def file_size(self) -> int:
         """Returns the size of the WAVE file in bytes."""
-        return len(self.stream)
-
-    def initialize_validator(self):
-        detect = Detect(self.stream)
+        return self._file_size
+
+    def close(self) -> None:
+        """
+        Releases the underlying stream.
+
+        Decoded chunks and read windows are dropped first, so a memory-mapped file is
+        unmapped right away. Payload views that the caller still holds keep the file
+        mapped until they, and the reader, are released.
+        """
+        # Nothing was cached yet when the constructor fails
+        parser = getattr(self, "_parser", None)
+        if parser is not None:
+            parser.clear()
+        chunk = getattr(self, "_chunk", None)
+        if chunk is not None:
+            chunk.release()
+
+        self._stream.close()
+
+    def __enter__(self) -> "Read":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def read_header(self) -> Optional[bytes]:
+        """
+        Reads the start of the stream in a single read.
+
+        Detection, the master and ds64 chunks, and the walk of every chunk header
+        within it are all served from that one read, and so are the payloads it
+        holds. Memory-mapped streams need no such read.
+        """
+        if isinstance(self.stream, MmapSource):
+            return None
+
+        return read_header(self.stream)
+
+    def initialize_validator(self, header: Optional[bytes] = None):
+        detect = Detect(self.stream, header)
         return detect.detect()
 
-    def initialize_chunks(self):
-        """Initializes chunks by reading from the source stream."""
-        stream = self.stream
-        chunk = Chunk(stream, ignore_chunks=self._ignore)
-        chunks = {}
-        # ignore = False
-        to_parse = []
-        for chunk_identifier, chunk_size, chunk_data in chunk.get_chunks():
-            to_parse.append((chunk_identifier, chunk_size, chunk_data))
-            chunks[chunk_identifier] = (chunk_size, chunk_data)
+    def initialize_chunks(self, header: Optional[bytes] = None):
+        """Initializes the chunk table by walking the chunk headers of the stream."""
+        chunk = self.new_chunk(header)
+        table = list(chunk.walk())
+
+        return self.adopt_chunks(chunk, table)
 
+    def new_chunk(self, header: Optional[bytes] = None) -> Chunk:
+        return Chunk(
+            self.stream,
+            ignore_chunks=self._ignore,
+            only_chunks=self._only,
+            max_eager_payload=self._max_eager,
+            header=header,
+        )
+
+    def adopt_chunks(self, chunk: Chunk, table: List[ChunkEntry]) -> dict:
+        self._chunk = chunk
         self._byteorder = chunk.byteorder
         self._master = chunk.master
         self._formtype = chunk.formtype
         self._ds64 = chunk.ds64
         self._chunk_identifiers = chunk.chunk_identifiers
-        self._to_parse = to_parse
-
-        return chunks
+        self._table = table
+
+        return {entry.identifier: entry for entry in table}
+
+    def restore_index(self) -> bool:
+        """
+        Restores the identity and chunk table from the index cache, if possible.
+
+        A cache that cannot be read is the same as a missing record, the stream
+        is walked instead.
+        """
+        if self._index is None or not isinstance(self._source, (str, Path)):
+            return False
+
+        try:
+            record = self._index.load(self._source)
+        except CACHE_ERRORS:
+            return False
+        if record is None:
+            return False
+
+        chunk = self.new_chunk()
+        chunk.master = record["master"]
+        chunk.formtype = record["formtype"]
+        chunk.byteorder = record["byteorder"]
+        chunk.ds64 = record["ds64"]
+        chunk.chunk_identifiers = [entry.identifier for entry in record["table"]]
+
+        self._identity = record["identity"]
+        self._chunks = self.adopt_chunks(chunk, record["table"])
+
+        return True
+
+    def store_index(self) -> None:
+        """
+        Stores the identity and chunk table in the index cache.
+
+        The cache only saves a walk, a cache that cannot be written is left as is.
+        """
+        if self._index is None or not isinstance(self._source, (str, Path)):
+            return
+
+        try:
+            self._index.store(
+                self._source,
+                identity=self._identity,
+                master=self._master,
+                formtype=self._formtype,
+                byteorder=self._byteorder,
+                ds64=self._ds64,
+                table=self._table,
+            )
+        except CACHE_ERRORS:
+            pass
 
     def initialize_parser(self):
-        parser = Parse(self._to_parse, self._byteorder)
-        parsed = parser.deparse()
+        """Initializes the parser, only the ['fmt '] chunk is decoded up front."""
+        parser = Parse(
+            self._table,
+            self._byteorder,
+            self.read_payload,
+            self._chunk.skipped,
+            self._columnar,
+        )
+        parser.get("fmt ")
+        # The header window was kept for the walk and ['fmt '], which are done
+        self._chunk.unpin()
 
         self._mode = parser.mode
         self._sanity = parser.sanity
 
-        return parsed
+        return parser
+
+    def read_payload(self, entry: ChunkEntry) -> Union[Payload, DeferredPayload]:
+        """
+        Reads the payload of a chunk.
+
+        Skipped chunks return an empty payload, and chunks over `max_eager_payload`
+        return a `DeferredPayload` that is only read when asked to.
+        """
+        if self._chunk.skipped(entry):
+            return b""
+
+        if self._chunk.deferred(entry):
+            return DeferredPayload(entry, self._chunk.read_chunk)
+
+        return self._chunk.read_chunk(entry)
 
     def initialize_reader(self):
-        format = self._parsed["fmt "]
-        # Could just use class name
-        match self._mode:
-            case "WAVE_FORMAT_PCM":
-                return PCMReader(format)
-            case "WAVE_FORMAT_EXTENDED":
-                return ExtendedReader(format)
-            case "WAVE_FORMAT_EXTENSIBLE":
-                return ExtensibleReader(format)
-            case "WAVE_FORMAT_PVOC_EX":
-                return PEXReader(format)
+        return format_reader(self._mode, self._parser.get("fmt "))
 
     # --- WAVE-specific accessible information
 
@@ -357,24 +531,53 @@ class Read:
         """Returns the master RIFF identifier."""
         return self._master
 
+    def prefetch(self, entries: List[ChunkEntry]) -> None:
+        """
+        Reads the payloads of `entries` ahead of time, merging nearby ones into a
+        few large positioned reads. Skipped and deferred chunks are left out.
+        """
+        self._chunk.fetch(
+            [
+                entry
+                for entry in entries
+                if not self._chunk.skipped(entry) and not self._chunk.deferred(entry)
+            ]
+        )
+
     def all(self) -> dict:
         """Returns all parsed chunks from the stream."""
-        return self._parsed
+        self.prefetch(self._parser.pending())
+        try:
+            return self._parser.deparse()
+        finally:
+            self._chunk.release()
 
     def all_raw(self) -> dict:
         """Returns all raw chunks from the stream."""
-        return self._chunks
+        self.prefetch(list(self._chunks.values()))
+        try:
+            return {
+                identifier: (entry.size, self.read_payload(entry))
+                for identifier, entry in self._chunks.items()
+            }
+        finally:
+            self._chunk.release()
 
     def get_chunk(self, chunk_identifier: str) -> Union[tuple, None]:
         """Returns the parsed specified chunk."""
-        return self._parsed.get(chunk_identifier, None)
+        return self._parser.get(chunk_identifier)
 
     def get_chunk_raw(self, chunk_identifier: str) -> Union[tuple, None]:
-        """Returns the unparsed specified chunk."""
-        return self._chunks.get(chunk_identifier, None)
+        """Returns the unparsed specified chunk, its payload is read on demand."""
+        entry = self._chunks.get(chunk_identifier, None)
+        if entry is None:
+            return None
+
+        return (entry.size, self.read_payload(entry))
 
     def get_summary(self) -> dict:
         """Returns a summary of the WAVE format and data chunk."""
+        data_chunk = self._parser.get("data")
         summary = {
             "format_info": {
                 "audio_format": self._reader.audio_format,
@@ -387,14 +590,14 @@ class Read:
                 "encoding": self._reader.encoding,
             },
             "data": {
-                "byte_count": self._parsed["data"].byte_count,
-                "frame_count": self._parsed["data"].frame_count,
+                "byte_count": data_chunk.byte_count,
+                "frame_count": data_chunk.frame_count,
             },
         }
 
         # Add 'samples' from 'fact' if it exists
         if "fact" in self._chunks:
-            fact_chunk = self._parsed["fact"]
+            fact_chunk = self._parser.get("fact")
             summary["fact"] = {
                 "samples": (
                     fact_chunk.samples if hasattr(fact_chunk, "samples") else None
@@ -407,11 +610,249 @@ class Read:
         """Returns whether the specified chunk exists in the WAVE stream."""
         return chunk_identifier in self._chunk_identifiers
 
+    # --- Audio frames
+
+    def frame_span(
+        self, start_frame: int = 0, frame_count: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """
+        Returns the stream offset and frame count of a range of ['data'] frames.
+
+        The range is clamped to the end of the ['data'] chunk.
+        """
+        entry = self._chunks.get("data", None)
+        if entry is None:
+            raise ValueError("The stream does not contain a ['data'] chunk.")
+
+        block_align = self._reader.block_align
+        # The pad byte of an odd sized ['data'] chunk is not part of any frame
+        total_frames = (entry.size - entry.padding) // block_align
+        if start_frame < 0 or start_frame > total_frames:
+            raise ValueError(
+                f"Start frame {start_frame} is outside of the {total_frames} available frames."
+            )
+
+        available = total_frames - start_frame
+        if frame_count is None or frame_count > available:
+            frame_count = available
+        elif frame_count < 0:
+            raise ValueError(f"Invalid frame count: {frame_count}")
+
+        return (entry.payload_offset + start_frame * block_align, frame_count)
+
+    @property
+    def decoder(self) -> SampleDecoder:
+        """Returns the sample decoder of the stream (requires NumPy)."""
+        if self._decoder is None:
+            self._decoder = sample_decoder(self._reader, self.byteorder)
+
+        return self._decoder
+
+    def channel_indices(self, channels: Sequence[Union[int, str]]) -> List[int]:
+        """
+        Resolves channels given by index or speaker label into channel indices.
+
+        Labels are looked up in the speaker layout of extensible streams, either by
+        name ("Front Left") or by abbreviation ("FL").
+        """
+        layout = getattr(self._reader, "speaker_layout", None) or []
+        indices = []
+        for channel in channels:
+            if isinstance(channel, str):
+                label = SPEAKER_ABBREVIATIONS.get(channel.upper(), channel)
+                if label not in layout:
+                    raise ValueError(
+                        f"Channel {channel!r} is not part of the speaker layout: {layout}"
+                    )
+                indices.append(layout.index(label))
+            else:
+                indices.append(channel)
+
+        return indices
+
+    def read_frames(
+        self,
+        start_frame: int = 0,
+        frame_count: Optional[int] = None,
+        decode: bool = False,
+        normalize: bool = False,
+        channels: Optional[Sequence[Union[int, str]]] = None,
+    ) -> Union[bytes, "np.ndarray"]:
+        """
+        Returns `frame_count` frames starting at `start_frame`.
+
+        Only the requested frames are read, the rest of the ['data'] chunk is never
+        touched. If `frame_count` is None, every frame up to the end is returned.
+
+        Frames are raw bytes, unless `decode` is set, in which case they are decoded
+        into a (frames, channels) array. `normalize` decodes them as float32 instead.
+
+        `channels` selects channels by index or speaker label, and implies `decode`.
+        The frames are then read block by block, so only the selected channels are
+        ever held in memory as a whole.
+        """
+        if channels is not None:
+            return self._read_channels(start_frame, frame_count, normalize, channels)
+
+        offset, frame_count = self.frame_span(start_frame, frame_count)
+        frames = self._chunk.read_at(offset, frame_count * self._reader.block_align)
+
+        if decode or normalize:
+            return self.decoder.decode(frames, normalize=normalize)
+
+        return frames
+
+    def _read_channels(
+        self,
+        start_frame: int,
+        frame_count: Optional[int],
+        normalize: bool,
+        channels: Sequence[Union[int, str]],
+    ) -> "np.ndarray":
+        indices = self.channel_indices(channels)
+        _, frame_count = self.frame_span(start_frame, frame_count)
+
+        samples = self.decoder.empty(frame_count, len(indices), normalize)
+        position = 0
+        for block in self.iter_blocks(
+            start_frame=start_frame,
+            frame_count=frame_count,
+            normalize=normalize,
+            channels=indices,
+        ):
+            samples[position : position + len(block)] = block
+            position += len(block)
+
+        return samples[:position]
+
+    def as_array(self, mmap: bool = False) -> Union["np.ndarray", LazyFrames]:
+        """
+        Returns every frame of the ['data'] chunk as a (frames, channels) array.
+
+        With `mmap`, nothing is read up front. 8/16/32-bit and float samples are
+        returned as a read-only `numpy.memmap` of their stored values, which the OS
+        pages in as it is sliced. 24-bit samples, and samples with fewer valid bits
+        than their container (24 in 32), are returned as `LazyFrames`, which decode
+        only the frames that are indexed. Both hold the same values as without
+        `mmap`. Mapping requires a file path source.
+        """
+        if not mmap:
+            return self.read_frames(decode=True)
+
+        if not isinstance(self._source, (str, Path)):
+            raise ValueError("Memory-mapped arrays require a file path source.")
+
+        offset, frame_count = self.frame_span()
+        if frame_count == 0:
+            return self.decoder.empty(0, self._reader.num_channels)
+
+        return memmap(self._source, offset, frame_count, self.decoder)
+
+    def iter_blocks(
+        self,
+        frames_per_block: int = DEFAULT_BLOCK_FRAMES,
+        start_frame: int = 0,
+        frame_count: Optional[int] = None,
+        decode: bool = False,
+        normalize: bool = False,
+        channels: Optional[Sequence[Union[int, str]]] = None,
+    ) -> Generator[Union[memoryview, "np.ndarray"], None, None]:
+        """
+        Yields the ['data'] chunk in blocks of `frames_per_block` raw frames.
+
+        Every block is read into the same preallocated buffer, so memory stays constant
+        regardless of the size of the stream. Each yielded view is only valid until the
+        next block is read, copy it (`bytes(block)`) to keep it around.
+
+        `decode`, `normalize` and `channels` yield decoded arrays instead, as in
+        `read_frames`. Native samples are views of the same buffer and follow the same
+        rule.
+        """
+        if frames_per_block <= 0:
+            raise ValueError(f"Invalid frames per block: {frames_per_block}")
+
+        offset, frame_count = self.frame_span(start_frame, frame_count)
+        block_align = self._reader.block_align
+
+        if channels is not None:
+            decode = True
+            channels = self.channel_indices(channels)
+
+        remaining = frame_count * block_align
+        buffer = bytearray(min(frames_per_block * block_align, remaining))
+        view = memoryview(buffer)
+        while remaining > 0:
+            size = min(len(buffer), remaining)
+            # Positioned, so other threads may read the stream in between
+            read = self.stream.readinto_at(view[:size], offset)
+            if read <= 0:
+                break
+
+            if decode or normalize:
+                yield self.decoder.decode(
+                    view[:read], normalize=normalize, channels=channels
+                )
+            else:
+                yield view[:read]
+
+            offset += read
+            remaining -= read
+
+    # --- Checksums
+
+    def md5(self, block_size: int = HASH_BLOCK_SIZE) -> bytes:
+        """
+        Returns the MD5 digest of the ['data'] payload, without its pad byte.
+
+        The payload is read in blocks of `block_size` bytes on a background thread,
+        and hashed as it arrives.
+        """
+        entry = self._chunks.get("data", None)
+        if entry is None:
+            raise ValueError("The stream does not contain a ['data'] chunk.")
+
+        return md5_span(
+            self.stream, entry.payload_offset, entry.size - entry.padding, block_size
+        )
+
+    def verify_md5(self, block_size: int = HASH_BLOCK_SIZE) -> bool:
+        """Returns whether the ['data'] payload matches the ['MD5 '] chunk."""
+        entry = self._chunks.get("MD5 ", None)
+        if entry is None:
+            raise ValueError("The stream does not contain an ['MD5 '] chunk.")
+
+        # Read regardless of the chunk options, the digest is compared as stored
+        checksum = bytes(self._chunk.read_chunk(entry)[:16])
+
+        return self.md5(block_size) == checksum
+
+    # --- Peak envelope
+
+    def peak_envelope(
+        self,
+        block_size: int = DEFAULT_PEAK_BLOCK_SIZE,
+        points_per_value: int = 2,
+        format: int = LEVL_FORMAT_UINT16,
+        workers: Optional[int] = None,
+    ) -> PeakEnvelopeChunk:
+        """
+        Generates the ['levl'] peak envelope of the ['data'] chunk (requires NumPy).
+
+        Every `block_size` frames are reduced to one peak frame, with a positive and
+        a negative peak per channel (or a single absolute one) as 8-bit (format 1) or
+        16-bit (format 2) values. Segments of the stream are reduced on `workers`
+        threads. Write it with `Update.write_chunk("levl", encode_levl(envelope))`.
+        """
+        return generate(self, block_size, points_per_value, format, workers)
+
     # def sanity(self) -> List[PerverseError]: ...
     # """Performs a sanity check on the WAVE stream."""
 
     def __getattr__(self, item):
         """Delegates access to the actual reader."""
+        if item.startswith("_"):
+            # Avoids recursing on attributes that are not yet initialized
+            raise AttributeError(item)
         if self._reader is None:
             raise AttributeError("Reader not initialized.")
         # Delegate attribute access to the reader
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -8,4 +8,14 @@ class ReaderOptions:
 
     to_dict: bool = True
     purge: bool = True
-    ignore_chunks: List[str] = field(default_factory=List)
+    ignore_chunks: List[str] = field(default_factory=list)
+    # Only read and decode the payloads of these chunks (['fmt '] is always read)
+    only_chunks: Optional[List[str]] = None
+    # Chunks larger than this (in bytes) are deferred rather than read
+    max_eager_payload: Optional[int] = None
+    # Directory in which walked chunk tables of file paths are cached
+    index_cache: Optional[str] = None
+    # Memory-map path sources, chunk payloads become zero-copy memoryviews
+    memory_map: bool = False
+    # Decode cue, smpl, strc and chna tables column by column, as `EntryTable`s
+    columnar_tables: bool = False
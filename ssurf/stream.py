@@ -1,17 +1,39 @@
+import io
+import mmap
 import os
+import threading
+import warnings
 
 from io import BufferedReader, BytesIO
 from pathlib import Path
-from typing import Protocol, Union
+from typing import BinaryIO, Optional, Protocol, Union
+
+# Bytes read from the start of a stream in one go, to detect and walk its header
+HEADER_READ_SIZE = 64 * 1024
+
+# Bytes read and discarded at a time when a forward-only stream skips ahead
+SKIP_BLOCK_SIZE = 64 * 1024
+
+# What reads are copied into, a whole buffer or a slice of one
+WritableBuffer = Union[bytearray, memoryview]
 
 
 class ReadableStream(Protocol):
     def read(self, size: int = -1) -> bytes: ...
 
+    def readinto(self, buffer: WritableBuffer) -> int: ...
+
+    # Positioned reads leave the cursor alone, and are safe from many threads at once
+    def read_at(self, offset: int, size: int) -> bytes: ...
+
+    def readinto_at(self, buffer: WritableBuffer, offset: int) -> int: ...
+
     def seek(self, offset: int = 0, whence: int = 0) -> None: ...
 
     def tell(self) -> int: ...
 
+    def close(self) -> None: ...
+
     def __len__(self) -> int: ...
 
     # def reset(self) -> None: ...
@@ -20,10 +42,38 @@ class ReadableStream(Protocol):
 class FileSource(ReadableStream):
     def __init__(self, fp: Union[Path, str]):
         self._stream = open(fp, "rb")
+        # Only used where the platform has no os.pread
+        self._lock = threading.Lock()
 
     def read(self, size: int = -1) -> bytes:
         return self._stream.read(size)
 
+    def readinto(self, buffer: WritableBuffer) -> int:
+        return self._stream.readinto(buffer)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        if not hasattr(os, "pread"):
+            with self._lock:
+                self._stream.seek(offset)
+                return self._stream.read(size)
+
+        return pread(self._stream.fileno(), offset, size)
+
+    def readinto_at(self, buffer: WritableBuffer, offset: int) -> int:
+        if not hasattr(os, "preadv"):
+            return copy_into(buffer, self.read_at(offset, len(buffer)))
+
+        fileno = self._stream.fileno()
+        with memoryview(buffer) as target:
+            total = 0
+            while total < len(target):
+                read = os.preadv(fileno, [target[total:]], offset + total)
+                if read <= 0:
+                    break
+                total += read
+
+        return total
+
     def seek(self, offset: int = 0, whence: int = 0) -> None:
         self._stream.seek(offset, whence)
 
@@ -33,42 +83,287 @@ class FileSource(ReadableStream):
     def close(self) -> None:
         self._stream.close()
 
+    def fileno(self) -> int:
+        return self._stream.fileno()
+
     def __len__(self) -> int:
-        self._stream.seek(0, os.SEEK_END)
-        return self._stream.tell()
+        # fstat rather than SEEK_END, so the cursor is left untouched
+        return os.fstat(self._stream.fileno()).st_size
 
 
 class BinarySource(ReadableStream):
     def __init__(self, stream: Union[BytesIO, BufferedReader]):
         self._stream = stream
+        # The caller's stream only has a cursor, positioned reads take turns on it
+        self._lock = threading.Lock()
 
     def read(self, size: int = -1) -> bytes:
         return self._stream.read(size)
 
+    def readinto(self, buffer: WritableBuffer) -> int:
+        return self._stream.readinto(buffer)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        with self._lock:
+            self._stream.seek(offset)
+            return self._stream.read(size)
+
+    def readinto_at(self, buffer: WritableBuffer, offset: int) -> int:
+        with self._lock:
+            self._stream.seek(offset)
+            return self._stream.readinto(buffer)
+
     def seek(self, offset: int = 0, whence: int = 0) -> None:
         self._stream.seek(offset, whence)
 
     def tell(self) -> int:
         return self._stream.tell()
 
+    def close(self) -> None:
+        # The caller owns the underlying stream, so it is left open
+        pass
+
     def __len__(self) -> int:
+        position = self._stream.tell()
         self._stream.seek(0, os.SEEK_END)
-        return self._stream.tell()
+        size = self._stream.tell()
+        self._stream.seek(position)
+        return size
 
 
 class ByteSource(ReadableStream):
     def __init__(self, data: bytes):
         self._stream = BytesIO(data)  # wrap
+        self._data = data
+        self._size = len(data)
 
     def read(self, size: int = -1) -> bytes:
         return self._stream.read(size)
 
+    def readinto(self, buffer: WritableBuffer) -> int:
+        return self._stream.readinto(buffer)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        return self._data[offset : offset + size]
+
+    def readinto_at(self, buffer: WritableBuffer, offset: int) -> int:
+        return copy_into(buffer, memoryview(self._data)[offset : offset + len(buffer)])
+
     def seek(self, offset: int = 0, whence: int = 0) -> None:
         self._stream.seek(offset, whence)
 
     def tell(self) -> int:
         return self._stream.tell()
 
+    def close(self) -> None:
+        self._stream.close()
+
     def __len__(self) -> int:
-        self._stream.seek(0, os.SEEK_END)
+        return self._size
+
+
+class MmapSource(ReadableStream):
+    def __init__(self, fp: Union[Path, str]):
+        self._file = open(fp, "rb")
+        try:
+            self._stream = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self._file.close()
+            raise
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+    def readinto(self, buffer: WritableBuffer) -> int:
+        position = self._stream.tell()
+        size = max(min(len(buffer), len(self._stream) - position), 0)
+        with memoryview(self._stream) as source, memoryview(buffer) as target:
+            target[:size] = source[position : position + size]
+        self._stream.seek(position + size)
+        return size
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        return self._stream[offset : offset + size]
+
+    def readinto_at(self, buffer: WritableBuffer, offset: int) -> int:
+        with memoryview(self._stream) as source:
+            return copy_into(buffer, source[offset : offset + len(buffer)])
+
+    def view_at(self, offset: int, size: int) -> memoryview:
+        """Returns a zero-copy view of `size` bytes at `offset`, the cursor is left alone."""
+        return memoryview(self._stream)[offset : offset + size]
+
+    def seek(self, offset: int = 0, whence: int = 0) -> None:
+        # Unlike files, mappings cannot be positioned past their end
+        if whence == os.SEEK_CUR:
+            offset += self._stream.tell()
+        elif whence == os.SEEK_END:
+            offset += len(self._stream)
+        self._stream.seek(min(max(offset, 0), len(self._stream)))
+
+    def tell(self) -> int:
         return self._stream.tell()
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        except BufferError:
+            warnings.warn(
+                "Payload views into the memory-mapped file are still alive, the file "
+                "stays mapped until they are released.",
+                ResourceWarning,
+                stacklevel=3,
+            )
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._stream)
+
+
+class ForwardSource(ReadableStream):
+    """
+    Stream that can only be read front to back, such as a pipe, stdin or a socket.
+
+    Seeking ahead reads and discards the bytes in between, in blocks of at most
+    `SKIP_BLOCK_SIZE`. Seeking back, and the size of the stream, are unsupported.
+    """
+
+    def __init__(self, source: Union[BinaryIO, bytes, Path, str]):
+        # Only a stream opened here is closed here
+        self._owned = isinstance(source, (str, Path, bytes))
+        if isinstance(source, (str, Path)):
+            self._stream = open(source, "rb")
+        elif isinstance(source, bytes):
+            self._stream = BytesIO(source)
+        elif hasattr(source, "read"):
+            self._stream = source
+        else:
+            raise ValueError(
+                f"Invalid source type: {type(source)}. Expected a readable stream, bytes, or file path."
+            )
+
+        self._position = 0
+        self._discard: Optional[bytearray] = None
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        # Pipes and sockets may return fewer bytes than asked, or None when empty
+        data = data or b""
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer: WritableBuffer) -> int:
+        if hasattr(self._stream, "readinto"):
+            read = self._stream.readinto(buffer) or 0
+        else:
+            read = copy_into(buffer, self._stream.read(len(buffer)) or b"")
+        self._position += read
+        return read
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        self.seek(offset)
+        return self.read(size)
+
+    def readinto_at(self, buffer: WritableBuffer, offset: int) -> int:
+        self.seek(offset)
+        return self.readinto(buffer)
+
+    def skip(self, size: int) -> int:
+        """Reads and discards up to `size` bytes, and returns how many there were."""
+        if self._discard is None:
+            self._discard = bytearray(SKIP_BLOCK_SIZE)
+
+        skipped = 0
+        with memoryview(self._discard) as discard:
+            while skipped < size:
+                read = self.readinto(discard[: min(len(discard), size - skipped)])
+                if read <= 0:
+                    break
+                skipped += read
+
+        return skipped
+
+    def seek(self, offset: int = 0, whence: int = 0) -> None:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("A forward-only stream has no known end.")
+
+        if offset < self._position:
+            raise io.UnsupportedOperation(
+                f"Cannot seek back to {offset}, the stream is already at {self._position}."
+            )
+        self.skip(offset - self._position)
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        if self._owned:
+            self._stream.close()
+
+    def __len__(self) -> int:
+        raise io.UnsupportedOperation("The size of a forward-only stream is unknown.")
+
+
+def read_header(stream: ReadableStream) -> bytes:
+    """Reads the first `HEADER_READ_SIZE` bytes of a stream in a single read."""
+    return positioned_read(stream, 0, HEADER_READ_SIZE)
+
+
+def read_at(
+    stream: ReadableStream, offset: int, size: int, header: Optional[bytes] = None
+) -> bytes:
+    """
+    Reads `size` bytes starting at `offset`, from `header` whenever it holds them.
+
+    A header shorter than `HEADER_READ_SIZE` holds the whole stream, so reads past
+    its end are answered from it as well, as the stream would.
+    """
+    if header is not None and (
+        offset + size <= len(header) or len(header) < HEADER_READ_SIZE
+    ):
+        return header[offset : offset + size]
+
+    return positioned_read(stream, offset, size)
+
+
+def positioned_read(stream: ReadableStream, offset: int, size: int) -> bytes:
+    """
+    Reads `size` bytes starting at `offset`, without using the cursor of `stream`.
+
+    Normalized streams read at a position on their own. Plain file objects are read
+    with `os.pread`, anything else seeks and reads.
+    """
+    if hasattr(stream, "read_at"):
+        return stream.read_at(offset, size)
+
+    fileno = getattr(stream, "fileno", None)
+    if fileno is None or not hasattr(os, "pread"):
+        stream.seek(offset)
+        return stream.read(size)
+
+    return pread(fileno(), offset, size)
+
+
+def pread(fileno: int, offset: int, size: int) -> bytes:
+    """Reads `size` bytes at `offset` of a file descriptor, up to its end."""
+    parts = []
+    while size > 0:
+        part = os.pread(fileno, size, offset)
+        if not part:
+            break
+        parts.append(part)
+        offset += len(part)
+        size -= len(part)
+
+    return b"".join(parts)
+
+
+def copy_into(buffer: WritableBuffer, data: Union[bytes, memoryview]) -> int:
+    """Copies `data` to the start of `buffer`, and returns how many bytes it holds."""
+    size = len(data)
+    with memoryview(buffer) as target:
+        target[:size] = data
+
+    return size
@@ -0,0 +1,285 @@
+import struct
+
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from ._constants import ENCODING
+from .chunk import Chunk, ChunkEntry
+from .utils import byteorder_symbol
+
+# Chunks whose payload is meaningless, and can be given up to grow a neighbour
+PADDING_IDENTIFIERS = ["JUNK", "PAD ", "FLLR"]
+
+# Chunks that can never be rewritten, moved or used as room for another chunk
+PROTECTED_IDENTIFIERS = ["data", "ds64", "fmt "]
+
+# List-types that are always written as a ['LIST'] chunk
+LIST_TYPES = ["INFO", "adtl"]
+
+# Offset of the first chunk, a ['JUNK'] chunk there is reserved for ds64
+FIRST_CHUNK_OFFSET = 12
+
+# Largest size a RIFF size field can hold
+RIFF_LIMIT = 0xFFFFFFFF
+
+# Where a chunk ended up after `Update.write_chunk`
+IN_PLACE = "in-place"
+PADDING = "padding"
+RELOCATED = "relocated"
+APPENDED = "appended"
+
+
+class Update:
+    """
+    Rewrite metadata chunks of a WAVE file in place, without rewriting its audio.
+
+    A chunk is overwritten where it is when its new payload has the same footprint,
+    or when what is left over can be filled with a ['JUNK'] chunk. A larger payload
+    takes over any adjacent ['JUNK'], ['PAD '] or ['FLLR'] padding. When nothing
+    fits, the old chunk is turned into ['JUNK'], the chunk is moved to the end of the
+    file and the RIFF (or ds64) size is patched. The bytes of ['data'] are never
+    written to.
+    """
+
+    def __init__(self, destination: Union[Path, str]):
+        self._stream = open(destination, "r+b")
+        try:
+            self.walk()
+        except Exception:
+            self._stream.close()
+            raise
+
+    @property
+    def byteorder(self) -> str:
+        return self._chunk.byteorder
+
+    @property
+    def master(self) -> str:
+        return self._chunk.master
+
+    @property
+    def chunks(self) -> List[ChunkEntry]:
+        return self._table
+
+    def walk(self) -> None:
+        """Walks the chunk headers of the file again."""
+        self._chunk = Chunk(self._stream)
+        self._table = list(self._chunk.walk())
+
+    def find(self, identifier: str) -> Optional[int]:
+        """
+        Returns the index of a chunk, ['LIST'] chunks are found by their list-type.
+
+        A bare "LIST" is only found when the file holds a single ['LIST'] chunk, and
+        a list-type held by more than one ['LIST'] chunk is ambiguous. Both raise.
+        """
+        if identifier == "LIST":
+            matches = [
+                index
+                for index, entry in enumerate(self._table)
+                if entry.identifier == "LIST"
+            ]
+        else:
+            matches = [
+                index
+                for index, entry in enumerate(self._table)
+                if entry.identifier == "LIST" and entry.list_type == identifier
+            ]
+
+        if len(matches) > 1:
+            raise ValueError(
+                f"The file holds {len(matches)} ['LIST'] chunks matching "
+                f"{identifier!r}, name the chunk by a list-type held by only one."
+            )
+        if matches:
+            return matches[0]
+
+        for index, entry in enumerate(self._table):
+            if entry.identifier == identifier:
+                return index
+
+        return None
+
+    def write_chunk(self, identifier: str, payload: bytes) -> str:
+        """
+        Replaces the payload of a chunk, or appends the chunk if the file has none.
+
+        `payload` is the full chunk payload, as returned by `Read.get_chunk_raw`, so
+        a ['LIST'] payload starts with its list-type. A ['LIST'] chunk is named
+        either by its list-type or by "LIST", in which case the list-type is read
+        from the payload. Returns where the chunk was written: `IN_PLACE`,
+        `PADDING`, `RELOCATED` or `APPENDED`.
+        """
+        if identifier == "LIST":
+            if len(payload) < 4:
+                raise ValueError("A ['LIST'] payload must start with its list-type.")
+            identifier = bytes(payload[:4]).decode(ENCODING).strip()
+
+        index = self.find(identifier)
+        if index is not None:
+            is_list = self._table[index].identifier == "LIST"
+        else:
+            is_list = identifier in LIST_TYPES
+
+        if is_list:
+            list_type = bytes(payload[:4]).decode(ENCODING).strip()
+            if list_type != identifier:
+                raise ValueError(
+                    f"A ['LIST'] payload of list-type {identifier!r} must start with "
+                    f"it, not with {list_type!r}."
+                )
+            identifier = "LIST"
+
+        if identifier in PROTECTED_IDENTIFIERS:
+            raise ValueError(f"The ['{identifier}'] chunk cannot be rewritten.")
+
+        if len(identifier) != 4:
+            raise ValueError(f"Invalid chunk identifier: {identifier!r}")
+
+        chunk = self.pack(identifier, payload)
+
+        if index is None:
+            self.append(chunk)
+            placement = APPENDED
+        else:
+            placement = self.place(index, chunk)
+
+        self._stream.flush()
+        self.walk()
+
+        return placement
+
+    def pack(self, identifier: str, payload: bytes) -> bytes:
+        """Builds a chunk, padded to an even size as the walker expects it."""
+        symbol = byteorder_symbol(self.byteorder)
+        chunk = identifier.encode("ascii") + struct.pack(f"{symbol}I", len(payload))
+        chunk += payload
+        # Same exception as the walker, odd sized ['bext'] chunks are not padded
+        if len(payload) % 2 != 0 and identifier != "bext":
+            chunk += b"\x00"
+
+        return chunk
+
+    def filler(self, footprint: int) -> bytes:
+        """Builds a zeroed ['JUNK'] chunk taking up exactly `footprint` bytes."""
+        symbol = byteorder_symbol(self.byteorder)
+        return b"JUNK" + struct.pack(f"{symbol}I", footprint - 8) + bytes(footprint - 8)
+
+    def place(self, index: int, chunk: bytes) -> str:
+        """Writes `chunk` over the chunk at `index`, its padding, or the end of the file."""
+        entry = self._table[index]
+        footprint = 8 + entry.size
+
+        if self.fits(len(chunk), footprint):
+            self.write_at(entry.header_offset, chunk, footprint)
+            return IN_PLACE
+
+        start, end = self.region(index)
+        if (start, end) != (entry.header_offset, entry.header_offset + footprint):
+            if self.fits(len(chunk), end - start):
+                self.write_at(start, chunk, end - start)
+                return PADDING
+
+        if index == len(self._table) - 1:
+            # Nothing follows the last chunk, it can grow or shrink where it is
+            self.append(chunk, entry.header_offset)
+            return IN_PLACE
+
+        if footprint % 2 != 0:
+            # Unpadded odd ['bext'], every filler is even so it cannot be blanked
+            raise ValueError(
+                f"The odd sized ['{entry.identifier}'] chunk at {entry.header_offset} "
+                "cannot be moved, it can only be rewritten with an odd sized payload."
+            )
+
+        # Appended first, so a file that cannot grow is left untouched
+        self.append(chunk)
+        self.write_at(entry.header_offset, b"", footprint)
+        return RELOCATED
+
+    def fits(self, size: int, room: int) -> bool:
+        """Whether a chunk of `size` bytes fits in `room`, the rest filled with ['JUNK']."""
+        # ['JUNK'] is always padded, an odd remainder (left by ['bext']) cannot be filled
+        remainder = room - size
+        return remainder == 0 or (remainder >= 8 and remainder % 2 == 0)
+
+    def region(self, index: int) -> Tuple[int, int]:
+        """Returns the span of the chunk at `index` and its adjacent padding chunks."""
+        entry = self._table[index]
+        start = entry.header_offset
+        end = entry.header_offset + 8 + entry.size
+
+        if index > 0 and self.spare(self._table[index - 1]):
+            start = self._table[index - 1].header_offset
+
+        if index + 1 < len(self._table) and self.spare(self._table[index + 1]):
+            following = self._table[index + 1]
+            end = following.header_offset + 8 + following.size
+
+        return start, end
+
+    def spare(self, entry: ChunkEntry) -> bool:
+        """Whether a chunk is padding that can be given up."""
+        if entry.identifier not in PADDING_IDENTIFIERS:
+            return False
+
+        # A plain RIFF file may need its first ['JUNK'] chunk to be promoted to RF64
+        return not (
+            self._chunk.ds64 is None
+            and entry.identifier == "JUNK"
+            and entry.header_offset == FIRST_CHUNK_OFFSET
+        )
+
+    def write_at(self, offset: int, chunk: bytes, footprint: int) -> None:
+        """Writes `chunk` at `offset`, and fills the rest of `footprint` with ['JUNK']."""
+        self._stream.seek(offset)
+        self._stream.write(chunk)
+        if footprint > len(chunk):
+            self._stream.write(self.filler(footprint - len(chunk)))
+
+    def append(self, chunk: bytes, offset: Optional[int] = None) -> None:
+        """
+        Writes `chunk` at the end of the file, and patches the master size.
+
+        If `offset` is given, the file is cut there first.
+        """
+        stream = self._stream
+        if offset is None:
+            # End of the last walked chunk, including its pad byte even if missing
+            last = self._table[-1]
+            offset = last.header_offset + 8 + last.size
+
+        # Checked before anything is written
+        riff_size = offset + len(chunk) - 8
+        if self._chunk.ds64 is None and riff_size > RIFF_LIMIT:
+            raise ValueError(
+                f"RIFF size {riff_size} exceeds the 4 GiB limit of a RIFF file."
+            )
+
+        stream.truncate(offset)
+        stream.seek(offset)
+        stream.write(chunk)
+
+        self.patch_size(riff_size)
+
+    def patch_size(self, riff_size: int) -> None:
+        """Writes the size of the master chunk, in ds64 for RF64 files."""
+        symbol = byteorder_symbol(self.byteorder)
+
+        if self._chunk.ds64 is not None:
+            # riff_low_size and riff_high_size, right after the ds64 header
+            self._stream.seek(FIRST_CHUNK_OFFSET + 8)
+            self._stream.write(struct.pack(f"{symbol}Q", riff_size))
+            return
+
+        self._stream.seek(4)
+        self._stream.write(struct.pack(f"{symbol}I", riff_size))
+
+    def close(self) -> None:
+        self._stream.close()
+
+    def __enter__(self) -> "Update":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
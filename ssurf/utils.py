@@ -1,3 +1,5 @@
+import sys
+
 from typing import Dict, Union
 
 from ._types import Byteorder
@@ -26,6 +28,11 @@ def purge(base: Dict) -> Dict:
     return base
 
 
+def intern_text(value: Union[str, bytes]) -> Union[str, bytes]:
+    """Interns decoded text, so equal values share one string. Bytes are returned as is."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 def sanitize_fallback(to_decode: bytes, encoding: str) -> Union[str, bytes]:
     """
     Decodes the provided bytes to the specified encoding, and sanitizes it of null bytes.
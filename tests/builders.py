@@ -0,0 +1,66 @@
+"""WAVE files built byte by byte, shared by the tests."""
+
+import random
+import struct
+
+NUM_CHANNELS = 2
+SAMPLE_RATE = 48000
+BLOCK_ALIGN = 4
+
+
+def chunk(identifier: bytes, payload: bytes, pad: bool = True) -> bytes:
+    """Builds a little-endian chunk, padded to an even size unless `pad` is False."""
+    padding = b"\x00" if pad and len(payload) % 2 else b""
+    return identifier + struct.pack("<I", len(payload)) + payload + padding
+
+
+def fmt_chunk() -> bytes:
+    """A 16-bit stereo PCM ['fmt '] chunk."""
+    return chunk(
+        b"fmt ",
+        struct.pack(
+            "<HHIIHH",
+            1,
+            NUM_CHANNELS,
+            SAMPLE_RATE,
+            SAMPLE_RATE * BLOCK_ALIGN,
+            BLOCK_ALIGN,
+            16,
+        ),
+    )
+
+
+def frames(frame_count: int, seed: int = 0) -> bytes:
+    """Random 16-bit stereo frames."""
+    return random.Random(seed).randbytes(frame_count * BLOCK_ALIGN)
+
+
+def bext_payload(description: bytes = b"description", history: bytes = b"") -> bytes:
+    """A ['bext'] payload, 602 bytes followed by the coding history."""
+    return description.ljust(256, b"\x00") + bytes(346) + history
+
+
+def info_payload(title: bytes = b"title") -> bytes:
+    """A ['LIST'] payload of list-type INFO."""
+    return b"INFO" + chunk(b"INAM", title + b"\x00")
+
+
+def riff(chunks: bytes) -> bytes:
+    """Wraps chunks in a RIFF/WAVE master chunk."""
+    return b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks
+
+
+def rf64(before: bytes, data: bytes, after: bytes = b"") -> bytes:
+    """
+    Builds an RF64 file whose ['data'] chunk holds `data`, between the chunks of
+    `before` and `after`. Both size fields are 0xFFFFFFFF, as ds64 holds the sizes.
+    """
+    padding = b"\x00" if len(data) % 2 else b""
+    body = before + b"data" + struct.pack("<I", 0xFFFFFFFF) + data + padding + after
+    riff_size = 4 + 36 + len(body)
+    ds64 = chunk(
+        b"ds64",
+        struct.pack("<QQQI", riff_size, len(data), len(data) // BLOCK_ALIGN, 0),
+    )
+
+    return b"RF64" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE" + ds64 + body
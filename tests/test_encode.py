@@ -0,0 +1,146 @@
+import hashlib
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+from ssurf import Read, Write
+from ssurf.decode import IEEE_FLOAT_FORMAT, PCM_FORMAT, SAMPLE_KINDS
+from ssurf.encode import RIFF_LIMIT
+
+from .builders import frames
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# (audio format, bits per sample, valid bits) of every sample kind, and 20 in 24
+FORMATS = [
+    (audio_format, width * 8, None) for audio_format, width in SAMPLE_KINDS
+] + [(PCM_FORMAT, 24, 20)]
+
+
+def samples(audio_format: int, bits: int, valid_bits, frame_count: int = 1000):
+    """Random (frames, 3) samples spanning the full range of a sample format."""
+    rng = np.random.default_rng(bits)
+    if audio_format == IEEE_FLOAT_FORMAT:
+        dtype = np.float32 if bits == 32 else np.float64
+        return rng.uniform(-1.0, 1.0, (frame_count, 3)).astype(dtype)
+
+    if bits == 8:
+        return rng.integers(0, 256, (frame_count, 3), dtype=np.uint8)
+
+    valid_bits = valid_bits or bits
+    low, high = -(1 << (valid_bits - 1)), 1 << (valid_bits - 1)
+    return rng.integers(low, high, (frame_count, 3), dtype=np.int64)
+
+
+class TestWrite(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, "write.wav")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_round_trip(self):
+        for audio_format, bits, valid_bits in FORMATS:
+            with self.subTest(audio_format=audio_format, bits=bits, valid=valid_bits):
+                written = samples(audio_format, bits, valid_bits)
+                with Write(
+                    self.path,
+                    48000,
+                    3,
+                    bits,
+                    audio_format=audio_format,
+                    valid_bits_per_sample=valid_bits,
+                ) as writer:
+                    writer.write_frames(written[:400])
+                    writer.write_frames(written[400:])
+
+                with Read(self.path) as reader:
+                    self.assertEqual(reader.num_channels, 3)
+                    self.assertEqual(reader.bits_per_sample, bits)
+                    array = reader.as_array()
+                    mapped = np.asarray(reader.as_array(mmap=True))
+
+                np.testing.assert_array_equal(array, written)
+                np.testing.assert_array_equal(mapped, written)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_normalized_round_trip(self):
+        written = np.random.default_rng(0).uniform(-1.0, 1.0, (1000, 2))
+        for bits in (8, 16, 24, 32):
+            with self.subTest(bits=bits):
+                with Write(self.path, 48000, 2, bits) as writer:
+                    writer.write_frames(written)
+
+                with Read(self.path) as reader:
+                    read = reader.read_frames(normalize=True)
+
+                # Rounding, and the clipping of 1.0 (8-bit samples are scaled by
+                # 127 up and 128 down), stay within two steps. Then float32 rounding.
+                step = 1.0 / (1 << (bits - 1))
+                np.testing.assert_allclose(read, written, rtol=0, atol=2 * step + 1e-7)
+
+    def test_promote(self):
+        head, tail = frames(100, seed=1), frames(100, seed=2)
+        # A hole past the RIFF limit stands for 4 GiB of frames, the file is sparse
+        hole = (RIFF_LIMIT // 4 + 1) * 4
+
+        with Write(self.path, 48000, 2, 16) as writer:
+            writer.write_frames(head)
+            writer._stream.seek(hole, os.SEEK_CUR)
+            writer._data_size += hole
+            writer.write_frames(tail)
+
+        data_size = len(head) + hole + len(tail)
+        file_size = os.path.getsize(self.path)
+        with open(self.path, "rb") as file:
+            header = file.read(12)
+
+        with Read(self.path) as reader:
+            self.assertEqual(reader.master, "RF64")
+            self.assertEqual(reader.ds64["chunk_size"], 28)
+            ds64 = reader.ds64
+            riff_size = ds64["riff_low_size"] + (ds64["riff_high_size"] << 32)
+            data = ds64["data_low_size"] + (ds64["data_high_size"] << 32)
+            sample_count = ds64["sample_low_count"] + (ds64["sample_high_count"] << 32)
+
+            self.assertEqual(riff_size, file_size - 8)
+            self.assertEqual(data, data_size)
+            self.assertEqual(sample_count, data_size // 4)
+            self.assertEqual(reader.get_chunk("data").frame_count, data_size // 4)
+            self.assertEqual(reader.read_frames(0, 100), head)
+            self.assertEqual(reader.read_frames(data_size // 4 - 100), tail)
+
+        # Both size fields are left to ds64
+        self.assertEqual(header, b"RF64" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE")
+
+    def test_md5(self):
+        # Mono 8-bit frames of an odd size, the pad byte is not hashed
+        written = random.Random(0).randbytes(1001)
+        with Write(self.path, 48000, 1, 8, md5=True) as writer:
+            writer.write_frames(written[:500])
+            writer.write_frames(written[500:])
+
+        with Read(self.path) as reader:
+            self.assertIn("MD5 ", reader.chunk_list)
+            self.assertEqual(reader.md5(), hashlib.md5(written).digest())
+            self.assertTrue(reader.verify_md5())
+
+        # A single changed frame no longer matches
+        with open(self.path, "r+b") as file:
+            offset = file.read().index(b"data") + 8
+            file.seek(offset)
+            file.write(bytes([written[0] ^ 0xFF]))
+
+        with Read(self.path) as reader:
+            self.assertFalse(reader.verify_md5())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,256 @@
+import os
+import random
+import struct
+import threading
+import unittest
+
+from ssurf import Feed, Read, ReadForward
+from ssurf.feed import (
+    UNKNOWN_SIZE,
+    ChunkCompleted,
+    ChunkFragment,
+    ChunkStarted,
+    Ds64Parsed,
+    HeaderDetected,
+    StreamEnded,
+)
+
+from .builders import (
+    BLOCK_ALIGN,
+    bext_payload,
+    chunk,
+    fmt_chunk,
+    frames,
+    info_payload,
+    rf64,
+    riff,
+)
+
+FRAMES = frames(1000)
+
+# Metadata on both sides of ['data'], an odd sized chunk and an odd sized ['bext']
+METADATA = (
+    chunk(b"bext", bext_payload(history=b"h"), pad=False),
+    chunk(b"iXML", b"<x>" + b"x" * 300 + b"</x>"),
+    chunk(b"abcd", b"odd"),
+    chunk(b"LIST", info_payload()),
+)
+
+WAVE = riff(
+    chunk(b"JUNK", bytes(28))
+    + fmt_chunk()
+    + METADATA[0]
+    + chunk(b"data", FRAMES)
+    + b"".join(METADATA[1:])
+)
+
+RF64 = rf64(fmt_chunk() + METADATA[0], FRAMES, b"".join(METADATA[1:]))
+
+
+def unknown_size(data: bytes) -> bytes:
+    """A RIFF file written by a streaming encoder, both sizes are left unknown."""
+    body = fmt_chunk() + b"data" + struct.pack("<I", UNKNOWN_SIZE) + data
+    return b"RIFF" + struct.pack("<I", UNKNOWN_SIZE) + b"WAVE" + body
+
+
+def fragments(wave: bytes, sizes) -> list:
+    """Splits `wave` into fragments of the given sizes, the last one takes the rest."""
+    pieces, position = [], 0
+    for size in sizes:
+        if position >= len(wave):
+            break
+        pieces.append(wave[position : position + size])
+        position += size
+
+    return pieces + [wave[position:]] if position < len(wave) else pieces
+
+
+def random_sizes(seed: int):
+    rng = random.Random(seed)
+    while True:
+        yield rng.randint(1, 600)
+
+
+def one_byte():
+    while True:
+        yield 1
+
+
+def feed_all(pieces) -> list:
+    """Feeds every piece to a new `Feed`, and returns all of its events."""
+    parser = Feed()
+    events = []
+    for piece in pieces:
+        events += parser.feed(piece)
+
+    return events + parser.close()
+
+
+def summary(events: list) -> dict:
+    """What the events tell about the stream, however its bytes were split."""
+    walked, payloads, decoded, other = [], {}, {}, []
+    for event in events:
+        if isinstance(event, ChunkStarted):
+            entry = event.entry
+            walked.append((entry.identifier, entry.header_offset, entry.size))
+            payloads[entry.header_offset] = b""
+        elif isinstance(event, ChunkFragment):
+            offset = event.entry.header_offset
+            assert event.position == len(payloads[offset]), "out of order"
+            payloads[offset] += bytes(event.data)
+        elif isinstance(event, ChunkCompleted):
+            entry = event.entry
+            identifier = entry.identifier
+            if identifier == "LIST":
+                identifier = entry.list_type
+            if event.chunk is not None:
+                decoded[identifier] = event.chunk
+            if event.payload is not None:
+                assert event.payload == payloads[entry.header_offset]
+        elif isinstance(event, (HeaderDetected, Ds64Parsed, StreamEnded)):
+            other.append(event)
+
+    return {"walked": walked, "payloads": payloads, "decoded": decoded, "other": other}
+
+
+class TestFeed(unittest.TestCase):
+    """Bytes fed in fragments of any size tell what `Read` tells of the whole file."""
+
+    def assert_matches_read(self, wave: bytes) -> None:
+        with Read(wave) as reader:
+            walked = [
+                (entry.identifier, entry.header_offset, entry.size)
+                for entry in reader._table
+            ]
+            payloads = {
+                entry.header_offset: bytes(reader.read_payload(entry))
+                for entry in reader._table
+            }
+            decoded = reader.all()
+
+        whole = summary(feed_all([wave]))
+        self.assertEqual(whole["walked"], walked)
+        self.assertEqual(whole["payloads"], payloads)
+        self.assertEqual(whole["decoded"], decoded)
+        self.assertEqual(whole["other"][-1], StreamEnded(len(wave), False))
+
+        for name, sizes in (
+            ("1-byte", one_byte()),
+            ("random", random_sizes(0)),
+            ("random", random_sizes(1)),
+        ):
+            with self.subTest(fragments=name):
+                self.assertEqual(summary(feed_all(fragments(wave, sizes))), whole)
+
+    def test_riff(self):
+        self.assert_matches_read(WAVE)
+
+    def test_rf64(self):
+        self.assert_matches_read(RF64)
+
+        events = feed_all([RF64])
+        header = events[0]
+        self.assertIsInstance(header, HeaderDetected)
+        self.assertEqual(header.master, "RF64")
+        self.assertIsNone(header.size)
+        self.assertIsInstance(events[1], Ds64Parsed)
+
+    def test_unknown_data_size(self):
+        wave = unknown_size(FRAMES)
+        for sizes in (one_byte(), random_sizes(2)):
+            parser = Feed()
+            events = []
+            for piece in fragments(wave, sizes):
+                events += parser.feed(piece)
+            # The ['data'] chunk only ends with the stream
+            self.assertNotIn(
+                "data",
+                [e.entry.identifier for e in events if isinstance(e, ChunkCompleted)],
+            )
+            self.assertIsNone(parser.payload_remaining)
+
+            events += parser.close()
+            result = summary(events)
+            self.assertEqual(result["walked"][-1], ("data", 36, len(FRAMES)))
+            self.assertEqual(result["payloads"][36], FRAMES)
+            self.assertEqual(
+                result["decoded"]["data"].frame_count, len(FRAMES) // BLOCK_ALIGN
+            )
+            self.assertIsNone(result["other"][0].size)
+            self.assertEqual(result["other"][-1], StreamEnded(len(wave), False))
+
+    def test_truncated(self):
+        events = feed_all([WAVE[: len(WAVE) - 10]])
+        self.assertEqual(events[-1], StreamEnded(len(WAVE) - 10, True))
+        completed = [e for e in events if isinstance(e, ChunkCompleted)]
+        self.assertNotIn("LIST", [event.entry.identifier for event in completed])
+
+    def test_ignore_chunks(self):
+        parser = Feed(ignore_chunks=["iXML"])
+        events = parser.feed(WAVE) + parser.close()
+        completed = {
+            e.entry.identifier: e for e in events if isinstance(e, ChunkCompleted)
+        }
+        self.assertIsNone(completed["iXML"].payload)
+        self.assertIsNone(completed["iXML"].chunk)
+        self.assertIsNotNone(completed["JUNK"].payload)
+
+        # As with `ReaderOptions`, nothing is ignored by default
+        events = feed_all([WAVE])
+        completed = {
+            e.entry.identifier: e for e in events if isinstance(e, ChunkCompleted)
+        }
+        self.assertEqual(completed["JUNK"].payload, bytes(28))
+
+
+class TestReadForward(unittest.TestCase):
+    """`ReadForward` over a pipe returns what `Read` returns of the file."""
+
+    def read_pipe(self, wave: bytes, frames_per_block: int = 100):
+        """Writes `wave` to a pipe from another thread, and reads it forward."""
+        read_fd, write_fd = os.pipe()
+
+        def write() -> None:
+            with os.fdopen(write_fd, "wb") as pipe:
+                for piece in fragments(wave, random_sizes(3)):
+                    pipe.write(piece)
+                    pipe.flush()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            with os.fdopen(read_fd, "rb") as pipe, ReadForward(pipe) as reader:
+                blocks = list(reader.iter_blocks(frames_per_block))
+                return reader, blocks
+        finally:
+            writer.join()
+
+    def test_pipe(self):
+        for wave in (WAVE, RF64):
+            with self.subTest(master=wave[:4]):
+                reader, blocks = self.read_pipe(wave)
+                self.assertEqual(b"".join(blocks), FRAMES)
+                self.assertEqual(
+                    [len(block) for block in blocks], [100 * BLOCK_ALIGN] * 10
+                )
+                self.assertEqual(reader.file_size, len(wave))
+                self.assertFalse(reader.truncated)
+
+                with Read(wave) as expected:
+                    self.assertEqual(reader.chunk_list, expected.chunk_list)
+                    self.assertEqual(reader.all(), expected.all())
+
+    def test_pipe_unknown_size(self):
+        # Frames that do not fill the last block
+        data = frames(1001)
+        reader, blocks = self.read_pipe(unknown_size(data), 250)
+
+        self.assertEqual(b"".join(blocks), data)
+        self.assertEqual(len(blocks[-1]), BLOCK_ALIGN)
+        self.assertIsNone(reader.file_size)
+        self.assertFalse(reader.truncated)
+        self.assertEqual(reader.get_chunk("data").frame_count, 1001)
+
+
+if __name__ == "__main__":
+    unittest.main()
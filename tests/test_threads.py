@@ -0,0 +1,129 @@
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from io import BytesIO
+
+from ssurf import Read, ReaderOptions
+from ssurf.read import DEFAULT_ROPTS
+
+from .builders import BLOCK_ALIGN, bext_payload, chunk, fmt_chunk, frames, riff
+
+THREADS = 16
+JOBS = 32
+CALLS_PER_JOB = 100
+
+FRAME_COUNT = 48000
+
+
+def build_wave() -> bytes:
+    """A 16-bit stereo RIFF file, with metadata on both sides of ['data']."""
+    cue = struct.pack("<I", 2) + struct.pack("<II4sIII", 1, 0, b"data", 0, 0, 0)
+    cue += struct.pack("<II4sIII", 2, 100, b"data", 0, 0, 100)
+    info = b"INFO" + chunk(b"INAM", b"title\x00") + chunk(b"ICMT", b"comment\x00")
+
+    return riff(
+        chunk(b"JUNK", bytes(28))
+        + fmt_chunk()
+        + chunk(b"data", frames(FRAME_COUNT))
+        + chunk(b"bext", bext_payload())
+        + chunk(b"iXML", b"<BWFXML>" + b"x" * 3000 + b"</BWFXML>")
+        + chunk(b"LIST", info)
+        + chunk(b"cue ", cue)
+    )
+
+
+class TestSharedRead(unittest.TestCase):
+    """One `Read` shared by many threads returns what it returns to a single one."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.wave = build_wave()
+        handle, cls.path = tempfile.mkstemp(suffix=".wav")
+        with os.fdopen(handle, "wb") as file:
+            file.write(cls.wave)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def check(self, open_source, options: ReaderOptions = DEFAULT_ROPTS) -> None:
+        """
+        Compares what 16 threads get from one fresh `Read` with what a separate, plain
+        one returns serially. Every thread starts with `get_chunk` calls, so the chunks
+        are decoded while the threads race for them, rather than served from a cache.
+        """
+        with Read(open_source()) as serial:
+            offset, total = serial.frame_span()
+            expected_all = serial.all()
+            expected_raw = {
+                identifier: bytes(payload)
+                for identifier, (_, payload) in serial.all_raw().items()
+            }
+
+        def job(seed: int) -> list:
+            rng = random.Random(seed)
+            errors = []
+
+            identifiers = list(expected_all)
+            rng.shuffle(identifiers)
+            for identifier in identifiers:
+                if reader.get_chunk(identifier) != expected_all[identifier]:
+                    errors.append(("get_chunk", identifier))
+
+            for _ in range(CALLS_PER_JOB):
+                call = rng.randrange(4)
+                if call == 0:
+                    start = rng.randrange(total)
+                    count = rng.randrange(1, 4000)
+                    end = offset + min(start + count, total) * BLOCK_ALIGN
+                    expected = self.wave[offset + start * BLOCK_ALIGN : end]
+                    if reader.read_frames(start, count) != expected:
+                        errors.append(("read_frames", start, count))
+                elif call == 1:
+                    identifier = rng.choice(list(expected_raw))
+                    _, payload = reader.get_chunk_raw(identifier)
+                    if bytes(payload) != expected_raw[identifier]:
+                        errors.append(("get_chunk_raw", identifier))
+                elif call == 2:
+                    identifier = rng.choice(identifiers)
+                    if reader.get_chunk(identifier) != expected_all[identifier]:
+                        errors.append(("get_chunk", identifier))
+                elif reader.all() != expected_all:
+                    errors.append(("all",))
+
+            return errors
+
+        with Read(open_source(), options) as reader:
+            with ThreadPoolExecutor(THREADS) as executor:
+                errors = [
+                    error
+                    for job_errors in executor.map(job, range(JOBS))
+                    for error in job_errors
+                ]
+
+        self.assertEqual(errors, [])
+
+    def test_path(self):
+        self.check(lambda: self.path)
+
+    def test_memory_map(self):
+        self.check(lambda: self.path, ReaderOptions(memory_map=True))
+
+    def test_bytes(self):
+        self.check(lambda: self.wave)
+
+    def test_bytes_io(self):
+        self.check(lambda: BytesIO(self.wave))
+
+    def test_buffered_reader(self):
+        with ExitStack() as stack:
+            self.check(lambda: stack.enter_context(open(self.path, "rb")))
+
+
+if __name__ == "__main__":
+    unittest.main()
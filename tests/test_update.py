@@ -0,0 +1,226 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from ssurf import Read, Update
+from ssurf.update import APPENDED, IN_PLACE, PADDING, RELOCATED
+
+from .builders import (
+    bext_payload,
+    chunk,
+    fmt_chunk,
+    frames,
+    info_payload,
+    rf64,
+    riff,
+)
+
+FRAMES = frames(1000)
+
+
+def xml(size: int, fill: bytes) -> bytes:
+    """An XML document of exactly `size` bytes."""
+    return b"<x>" + fill * (size - 7) + b"</x>"
+
+
+def layout(*chunks: bytes) -> bytes:
+    """A RIFF file holding `chunks` after a ['JUNK'], ['fmt '] and ['data'] chunk."""
+    head = chunk(b"JUNK", bytes(28)) + fmt_chunk() + chunk(b"data", FRAMES)
+    return riff(head + b"".join(chunks))
+
+
+# iXML and bext are surrounded by other chunks, a ['JUNK'] chunk follows bext, and
+# the ['LIST'] chunk is the last one
+STANDARD = layout(
+    chunk(b"iXML", xml(100, b"x")),
+    chunk(b"bext", bext_payload()),
+    chunk(b"JUNK", bytes(200)),
+    chunk(b"LIST", info_payload()),
+)
+
+# The ['LIST'] chunk is the last one, and has no padding to take over
+TAIL = layout(chunk(b"bext", bext_payload()), chunk(b"LIST", info_payload()))
+
+
+class TestUpdate(unittest.TestCase):
+    """Every outcome of `Update.write_chunk`, checked by reading the file back."""
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, "update.wav")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def write(self, wave: bytes) -> None:
+        with open(self.path, "wb") as file:
+            file.write(wave)
+
+    def update(self, identifier: str, payload: bytes) -> str:
+        with Update(self.path) as update:
+            return update.write_chunk(identifier, payload)
+
+    def table(self) -> list:
+        """The (identifier, header offset, size) of every chunk of the file."""
+        with Read(self.path) as reader:
+            return [
+                (entry.identifier, entry.header_offset, entry.size)
+                for entry in reader._table
+            ]
+
+    def assert_readable(self) -> None:
+        """The file decodes, its master size is right and its frames are unchanged."""
+        with open(self.path, "rb") as file:
+            wave = file.read()
+
+        with Read(self.path) as reader:
+            reader.all()
+            self.assertEqual(reader.read_frames(), FRAMES)
+            if reader.ds64 is None:
+                riff_size = struct.unpack("<I", wave[4:8])[0]
+            else:
+                riff_size = reader.ds64["riff_low_size"]
+                riff_size += reader.ds64["riff_high_size"] << 32
+
+        self.assertEqual(riff_size, len(wave) - 8)
+
+    def payload(self, identifier: str) -> bytes:
+        with Read(self.path) as reader:
+            return bytes(reader.get_chunk_raw(identifier)[1])
+
+    def test_same_size(self):
+        self.write(STANDARD)
+        self.assertEqual(self.update("iXML", xml(100, b"y")), IN_PLACE)
+
+        self.assert_readable()
+        self.assertEqual(self.payload("iXML"), xml(100, b"y"))
+        self.assertEqual(os.path.getsize(self.path), len(STANDARD))
+
+    def test_shrink_fills_with_junk(self):
+        self.write(STANDARD)
+        before = {identifier: offset for identifier, offset, _ in self.table()}
+        self.assertEqual(self.update("iXML", xml(60, b"y")), IN_PLACE)
+
+        self.assert_readable()
+        self.assertEqual(self.payload("iXML"), xml(60, b"y"))
+        identifiers = [identifier for identifier, _, _ in self.table()]
+        self.assertEqual(
+            identifiers,
+            ["JUNK", "fmt ", "data", "iXML", "JUNK", "bext", "JUNK", "LIST"],
+        )
+        # The filler takes the 40 bytes given up by iXML, nothing else moves
+        self.assertIn(("JUNK", before["iXML"] + 68, 32), self.table())
+        self.assertEqual(os.path.getsize(self.path), len(STANDARD))
+
+    def test_padding(self):
+        self.write(STANDARD)
+        bext = bext_payload(history=b"h" * 150)
+        self.assertEqual(self.update("bext", bext), PADDING)
+
+        self.assert_readable()
+        self.assertEqual(self.payload("bext"), bext)
+        identifiers = [identifier for identifier, _, _ in self.table()]
+        self.assertEqual(
+            identifiers, ["JUNK", "fmt ", "data", "iXML", "bext", "JUNK", "LIST"]
+        )
+        self.assertEqual(os.path.getsize(self.path), len(STANDARD))
+
+    def test_relocated(self):
+        self.write(STANDARD)
+        offset = {identifier: offset for identifier, offset, _ in self.table()}
+        self.assertEqual(self.update("iXML", xml(300, b"y")), RELOCATED)
+
+        self.assert_readable()
+        self.assertEqual(self.payload("iXML"), xml(300, b"y"))
+        table = self.table()
+        self.assertEqual(table[3], ("JUNK", offset["iXML"], 100))
+        self.assertEqual(table[-1][0], "iXML")
+        self.assertEqual(os.path.getsize(self.path), len(STANDARD) + 308)
+
+    def test_appended(self):
+        self.write(STANDARD)
+        self.assertEqual(self.update("abcd", b"z" * 11), APPENDED)
+
+        self.assert_readable()
+        self.assertEqual(self.payload("abcd"), b"z" * 11 + b"\x00")
+        self.assertEqual(self.table()[-1][0], "abcd")
+        self.assertEqual(os.path.getsize(self.path), len(STANDARD) + 20)
+
+    def test_last_chunk_grows(self):
+        self.write(TAIL)
+        info = info_payload(b"a much longer title")
+        self.assertEqual(self.update("INFO", info), IN_PLACE)
+
+        self.assert_readable()
+        self.assertEqual(self.payload("LIST"), info)
+        self.assertEqual(os.path.getsize(self.path), len(TAIL) + 14)
+
+    def test_last_chunk_shrinks(self):
+        self.write(TAIL)
+        # Two bytes smaller, too few for a filler, so the file is cut instead
+        info = info_payload(b"tit")
+        self.assertEqual(self.update("LIST", info), IN_PLACE)
+
+        self.assert_readable()
+        self.assertEqual(self.payload("LIST"), info)
+        self.assertEqual(self.table()[-1][0], "LIST")
+        self.assertEqual(os.path.getsize(self.path), len(TAIL) - 2)
+
+    def test_rf64_size(self):
+        wave = rf64(fmt_chunk(), FRAMES, chunk(b"iXML", xml(100, b"x")))
+        self.write(wave)
+        self.assertEqual(self.update("abcd", b"z" * 100), APPENDED)
+        self.assertEqual(self.update("iXML", xml(300, b"y")), RELOCATED)
+
+        self.assert_readable()
+        self.assertEqual(self.payload("abcd"), b"z" * 100)
+        self.assertEqual(self.payload("iXML"), xml(300, b"y"))
+        with open(self.path, "rb") as file:
+            header = file.read(8)
+        # The size is patched in ds64, the RIFF size field is left as is
+        self.assertEqual(header, b"RF64" + struct.pack("<I", 0xFFFFFFFF))
+
+    def test_first_junk_is_kept_for_ds64(self):
+        self.write(
+            riff(
+                chunk(b"JUNK", bytes(28))
+                + chunk(b"bext", bext_payload())
+                + fmt_chunk()
+                + chunk(b"data", FRAMES)
+            )
+        )
+        bext = bext_payload(history=b"h" * 10)
+        self.assertEqual(self.update("bext", bext), RELOCATED)
+
+        self.assert_readable()
+        self.assertEqual(self.payload("bext"), bext)
+        self.assertEqual(self.table()[0], ("JUNK", 12, 28))
+
+    def test_odd_bext(self):
+        odd = bext_payload(history=b"h")
+        wave = layout(chunk(b"bext", odd, pad=False), chunk(b"LIST", info_payload()))
+        self.write(wave)
+
+        with self.assertRaises(ValueError):
+            self.update("bext", bext_payload(history=b"h" * 99))
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), wave)
+
+        # The same odd footprint can still be rewritten
+        self.assertEqual(self.update("bext", bext_payload(b"other", b"h")), IN_PLACE)
+        self.assert_readable()
+        self.assertEqual(self.payload("bext"), bext_payload(b"other", b"h"))
+
+    def test_protected(self):
+        self.write(STANDARD)
+        for identifier in ("data", "fmt "):
+            with self.assertRaises(ValueError):
+                self.update(identifier, b"\x00" * 16)
+
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), STANDARD)
+
+
+if __name__ == "__main__":
+    unittest.main()